@@ -32,6 +32,10 @@ MAX_FILE_SIZE = 500000
 FILE_WATCHER_INTERVAL_MS = 10000
 PERIODIC_SAVE_INTERVAL_SECONDS = 30
 PROCESS_POOL_THRESHOLD_KB = 200
+IO_THREAD_POOL_SIZE = min(32, (os.cpu_count() or 1) + 4)
+try: IO_THREAD_POOL_SIZE = max(1, int(os.environ.get('CPG_THREAD_POOL_SIZE', IO_THREAD_POOL_SIZE)))
+except ValueError as e: logging.warning("Invalid CPG_THREAD_POOL_SIZE, using %s. Error: %s", IO_THREAD_POOL_SIZE, e)
+MAX_IO_WORKERS = min(16, (os.cpu_count() or 1) * 2)
 
 # App Setup & Initialization
 # ------------------------------
@@ -40,7 +44,7 @@ def load_config():
 	config_path = os.path.join(BASE_DIR, 'config.ini')
 	if not os.path.exists(config_path): sys.stderr.write("Configuration Error: config.ini file not found.\n"); sys.exit(1)
 	config.read(config_path, encoding='utf-8')
-	global CACHE_EXPIRY_SECONDS, MAX_FILES, MAX_CONTENT_SIZE, MAX_FILE_SIZE, FILE_WATCHER_INTERVAL_MS, PERIODIC_SAVE_INTERVAL_SECONDS, PROCESS_POOL_THRESHOLD_KB
+	global CACHE_EXPIRY_SECONDS, MAX_FILES, MAX_CONTENT_SIZE, MAX_FILE_SIZE, FILE_WATCHER_INTERVAL_MS, PERIODIC_SAVE_INTERVAL_SECONDS, PROCESS_POOL_THRESHOLD_KB, MAX_IO_WORKERS
 	try:
 		CACHE_EXPIRY_SECONDS = config.getint('Limits','CACHE_EXPIRY_SECONDS', fallback=3600)
 		MAX_FILES = config.getint('Limits','MAX_FILES', fallback=500)
@@ -49,6 +53,7 @@ def load_config():
 		FILE_WATCHER_INTERVAL_MS = config.getint('Limits', 'FILE_WATCHER_INTERVAL_MS', fallback=10000)
 		PERIODIC_SAVE_INTERVAL_SECONDS = config.getint('Limits', 'PERIODIC_SAVE_INTERVAL_SECONDS', fallback=30)
 		PROCESS_POOL_THRESHOLD_KB = config.getint('Limits', 'PROCESS_POOL_THRESHOLD_KB', fallback=200)
+		MAX_IO_WORKERS = max(1, config.getint('Limits', 'MAX_IO_WORKERS', fallback=0) or MAX_IO_WORKERS)
 	except (configparser.Error, ValueError) as e: logging.warning("Could not parse config.ini, using defaults. Error: %s", e)
 
 def ensure_data_dirs():
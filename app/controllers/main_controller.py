@@ -1,13 +1,14 @@
 # File: app/controllers/main_controller.py
 # LLM NOTE: LLM Editor, follow these code style guidelines: (1) No docstrings or extra comments; (2) Retain the file path comment, LLM note, and grouping/separation markers exactly as is; (3) Favor concise single-line statements; (4) Preserve code structure and organization.
 
-import os, time, threading, queue, hashlib, platform, subprocess, codecs, re, concurrent.futures, shutil
+import os, time, threading, queue, hashlib, logging, functools, platform, subprocess, codecs, re, concurrent.futures, shutil, struct, collections
 from tkinter import filedialog, TclError
 import traceback
-from app.config import get_logger, set_project_file_handler, CACHE_DIR, PRECOMPUTE_CACHE_DIR, PROJECTS_DIR, INSTANCE_ID, PERIODIC_SAVE_INTERVAL_SECONDS, PROCESS_POOL_THRESHOLD_KB, FILE_WATCHER_INTERVAL_MS, LAST_OWN_WRITE_TIMES, LAST_OWN_WRITE_TIMES_LOCK
+from app.config import get_logger, set_project_file_handler, CACHE_DIR, PRECOMPUTE_CACHE_DIR, PROJECTS_DIR, INSTANCE_ID, PERIODIC_SAVE_INTERVAL_SECONDS, PROCESS_POOL_THRESHOLD_KB, FILE_WATCHER_INTERVAL_MS, LAST_OWN_WRITE_TIMES, LAST_OWN_WRITE_TIMES_LOCK, IO_THREAD_POOL_SIZE
 from app.utils.ui_helpers import show_error_centered, show_warning_centered, show_yesno_centered, show_yesnocancel_centered, format_german_thousand_sep
-from app.utils.system_utils import open_in_editor, unify_line_endings, open_in_vscode, get_relative_time_str
+from app.utils.system_utils import open_in_editor, unify_line_endings, dedup_lines, sort_lines, write_unified_text, open_in_vscode, get_relative_time_str, DebounceScheduler, PriorityTaskPool
 from app.utils.escape_utils import safe_escape, safe_unescape
+from app.utils.file_io import replace_with_retry
 from datetime import datetime
 from filelock import Timeout
 try:
@@ -16,10 +17,31 @@ try:
 except ImportError:
 	Observer = None
 	FileSystemEventHandler = object
+try: import blake3
+except ImportError: blake3 = None
 from app.custom_scripts.manager import CustomScriptsManager
 
 logger = get_logger(__name__)
 
+BLOCKQUOTE_RE = re.compile(r'\r+$|^> |^[^\S\n]*>[^\S\n]*$', re.M)
+CLEAN_RE = re.compile(r'^```[^\n]*(?:\n(?!```)[^\n]*)*(?:\n```[^\n]*)?|^ [^\n]*|`{1,3}[^`\n]*`{1,3}|\*\*', re.M)
+TRUNCATE_SCAN_RE = re.compile(r'^[^\S\n]*```[^\n]*(?:\n(?![^\S\n]*```)[^\n]*)*(?:\n[^\S\n]*```[^\n]*)?|^([^\S\n]*---[^\S\n]*)$', re.M)
+QUICK_OPS = {
+	"Truncate Between '---'": lambda ctrl, t: ctrl.process_truncate_format(t),
+	"Replace \"**\"": lambda ctrl, t: (ctrl._extended_text_cleaning(t), "Cleaned text and copied"),
+	"Gemini Whitespace Fix": lambda ctrl, t: (t.replace('\u00A0', ' '), "Fixed whitespace and copied"),
+	"Remove Duplicates": lambda ctrl, t: (dedup_lines(t), "Removed duplicates and copied"),
+	"Sort Alphabetically": lambda ctrl, t: (sort_lines(t), "Sorted alphabetically and copied"),
+	"Sort by Length": lambda ctrl, t: (sort_lines(t, key=len), "Sorted by length and copied"),
+	"Escape Text": lambda ctrl, t: (safe_escape(t.rstrip('\n')), "Escaped text and copied"),
+	"Unescape Text": lambda ctrl, t: (safe_unescape(t.rstrip('\n')), "Unescaped text and copied")
+}
+TASK_PRIORITIES = {'generation': 0, 'custom_script': 1, 'char_count': 2, 'history_cache': 3}
+SUPERSEDING_TASKS = frozenset({'char_count'})
+
+@functools.cache
+def background_pool(): return PriorityTaskPool(IO_THREAD_POOL_SIZE, "cpg-bg")
+
 # Top-level worker for ProcessPoolExecutor to enable pickling
 # ------------------------------
 def process_pool_worker(args):
@@ -27,6 +49,10 @@ def process_pool_worker(args):
 	from app.models.project_model import ProjectModel
 	return ProjectModel.simulate_generation_static(selected_files, template_content, clipboard_content, dir_tree, project_prefix, model_config, file_separator_template)
 
+def process_pool_warmup():
+	from app.models.project_model import ProjectModel
+	return ProjectModel is not None
+
 # Main Controller
 # ------------------------------
 class MainController:
@@ -36,11 +62,17 @@ class MainController:
 		self.project_model = project_model
 		self.settings_model = settings_model
 		self.view = None
-		self.queue = queue.Queue()
+		self.queue = queue.SimpleQueue()
 		self.char_count_token = 0
-		self.precompute_request = threading.Event()
+		self._last_count_display, self._idle_streak = None, 0
+		self._clip_val, self._clip_ts = "", float('-inf')
+		self.precompute_cv = threading.Condition()
+		self.precompute_pending = False
+		self._precompute_after = None
+		self.PRECOMPUTE_DEBOUNCE_MS = 75
 		self.precompute_thread = None
-		self.precomputed_prompt_cache = {}
+		self.precomputed_prompt_cache = collections.OrderedDict()
+		self.PRECOMPUTE_CACHE_MAX_ENTRIES = 20
 		self.precomputed_file_path = os.path.join(PRECOMPUTE_CACHE_DIR, f"cpg_precompute_{INSTANCE_ID}.tmp")
 		self.precomputed_file_key = None
 		self.precompute_file_lock = threading.Lock()
@@ -51,16 +83,17 @@ class MainController:
 		self.periodic_save_thread = None
 		self._config_observer = None
 		self._config_poll_thread = None
-		self.char_count_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-		self.background_task_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
-		self.quick_action_semaphore = threading.BoundedSemaphore(4)
+		self.background_task_pool = background_pool()
+		self.quick_action_queue, self.quick_action_thread = queue.Queue(maxsize=1), None
+		self.output_save_queue, self.output_save_thread = queue.Queue(), None
 		self.generation_process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+		self.submit_task('process', process_pool_warmup)
 		self.custom_script_semaphore = threading.BoundedSemaphore(1)
 		self.save_lock = threading.Lock()
-		self.FENCED_CODE_SPLIT_RE = re.compile(r'(`{1,3}[^`]*`{1,3})')
-		self.DELIMITER_RE = re.compile(r'^\s*---\s*$')
 		self.custom_scripts = CustomScriptsManager(self)
 		self.history_render_cache = {}; self.history_cache_lock = threading.Lock()
+		self._tpl_cache, self._key_files_cache, self._proj_path_cache = {}, None, None
+		self._autoblacklist_pending = None
 		self.initialize_state()
 
 	def set_view(self, view):
@@ -88,19 +121,21 @@ class MainController:
 		self.start_config_watcher()
 		self.start_precompute_worker()
 		self.start_periodic_save_worker()
+		self.start_quick_action_worker()
+		self.start_output_save_worker()
 		self.project_model.start_file_watcher(self.queue)
 
 	def stop_threads(self):
 		logger.info("Issuing non-blocking shutdown signal to all threads.")
 		self._stop_event.set()
-		self.precompute_request.set()
+		with self.precompute_cv: self.precompute_cv.notify_all()
+		try: self.quick_action_queue.put_nowait(None)
+		except queue.Full: pass
 		if hasattr(self, '_config_handler') and hasattr(self._config_handler, 'cancel_all_timers'):
 			self._config_handler.cancel_all_timers()
 		if self._config_observer and Observer:
 			try: self._config_observer.stop()
 			except Exception: pass
-		if self.char_count_executor: self.char_count_executor.shutdown(wait=False, cancel_futures=True)
-		if self.background_task_pool: self.background_task_pool.shutdown(wait=False, cancel_futures=True)
 		if self.generation_process_pool: self.generation_process_pool.shutdown(wait=False, cancel_futures=True)
 
 	def run_custom_script(self, script_id):
@@ -124,7 +159,7 @@ class MainController:
 			finally:
 				try: self.custom_script_semaphore.release()
 				except Exception: pass
-		fut = self.background_task_pool.submit(worker)
+		fut = self.submit_task('custom_script', worker)
 		def done(f):
 			try: res = f.result()
 			except Exception as e:
@@ -143,18 +178,23 @@ class MainController:
 		except OSError as e:
 			logger.warning("Could not remove precompute temp file: %s", e)
 
+		if self.output_save_thread and self.output_save_thread.is_alive():
+			self.output_save_queue.put(None); self.output_save_thread.join(timeout=2.0)
+
+		lock_acquired = self.save_lock.acquire(timeout=0.5)
 		try:
-			with self.save_lock:
-				if self.view and self.view.winfo_exists():
-					self.settings_model.set('window_geometry', self.view.geometry())
-					self._save_current_project_state()
-				self.project_model.save()
-				self.settings_model.save_settings()
-				self.settings_model.save_templates()
-				self.settings_model.save_history()
-				logger.info("Final state and data saved successfully.")
+			if self.view and self.view.winfo_exists():
+				self.settings_model.set('window_geometry', self.view.geometry())
+				self._save_current_project_state()
+			self.project_model.save()
+			self.settings_model.save_settings()
+			self.settings_model.save_templates()
+			self.settings_model.save_history()
+			logger.info("Final state and data saved successfully.")
 		except Exception as e:
 			logger.error(f"CRITICAL: Failed to save data during shutdown. Error: {e}", exc_info=True)
+		finally:
+			if lock_acquired: self.save_lock.release()
 
 		if self.view and self.view.winfo_exists():
 			self.view.destroy()
@@ -174,20 +214,11 @@ class MainController:
 				self.queue = queue
 				self.settings_model = settings_model
 				self.project_model = project_model
-				self._timers = {}
-				self._lock = threading.Lock()
+				self._scheduler = DebounceScheduler(0.5, "ConfigDebounce")
 
-			def cancel_all_timers(self):
-				with self._lock:
-					for timer in self._timers.values(): timer.cancel()
-					self._timers.clear()
+			def cancel_all_timers(self): self._scheduler.cancel_all()
 
-			def _debounce_action(self, key, action):
-				with self._lock:
-					if key in self._timers: self._timers[key].cancel()
-					self._timers[key] = threading.Timer(0.5, action)
-					self._timers[key].daemon = True
-					self._timers[key].start()
+			def _debounce_action(self, key, action): self._scheduler.schedule(key, action)
 
 			def on_any_event(self, event):
 				path = getattr(event, 'dest_path', event.src_path)
@@ -249,12 +280,16 @@ class MainController:
 			def get_mtime(path):
 				try: return os.path.getmtime(path)
 				except OSError: return 0
+			def get_mtime_ns(path):
+				try: return os.stat(path).st_mtime_ns
+				except OSError: return 0
 
 			mtimes['settings'] = get_mtime(self.settings_model.settings_file)
 			mtimes['templates'] = get_mtime(self.settings_model.templates_file)
 			mtimes['history'] = get_mtime(self.settings_model.history_file)
 			if os.path.isdir(PROJECTS_DIR):
 				for p in mtimes['projects']: mtimes['projects'][p] = get_mtime(os.path.join(PROJECTS_DIR, p, 'project.json'))
+			mtimes['projects_root'] = get_mtime_ns(PROJECTS_DIR)
 
 			interval = max(3, FILE_WATCHER_INTERVAL_MS // 1000)
 			while not self._stop_event.wait(interval):
@@ -273,12 +308,12 @@ class MainController:
 					check_and_queue("history", self.settings_model.history_file, "history")
 
 					if os.path.isdir(PROJECTS_DIR):
-						project_folders = os.listdir(PROJECTS_DIR)
+						root_mtime = get_mtime_ns(PROJECTS_DIR)
 						changed = False
-						if set(project_folders) != set(mtimes['projects'].keys()):
+						if root_mtime != mtimes['projects_root'] and set(os.listdir(PROJECTS_DIR)) != set(mtimes['projects'].keys()):
 							changed = True
 						else:
-							for p_folder in project_folders:
+							for p_folder in list(mtimes['projects'].keys()):
 								p_file = os.path.join(PROJECTS_DIR, p_folder, 'project.json')
 								new_mtime = get_mtime(p_file)
 								if new_mtime > mtimes['projects'].get(p_folder, 0):
@@ -288,6 +323,7 @@ class MainController:
 									if abs(new_mtime - last_own_write) > 0.1:
 										changed = True
 										break
+						mtimes['projects_root'] = root_mtime
 						if changed:
 							mtimes['projects'] = {p: get_mtime(os.path.join(PROJECTS_DIR, p, 'project.json')) for p in os.listdir(PROJECTS_DIR) if os.path.isdir(os.path.join(PROJECTS_DIR, p))}
 							self.queue.put(("reload_projects", None))
@@ -367,18 +403,19 @@ class MainController:
 			self.project_model.save(project_name=current_project)
 		
 		self.view.clear_ui_for_loading()
+		self._last_count_display = None
 		self.view.file_search_var.set("")
 		self.view.show_loading_placeholder()
 		
 		self.project_model.set_current_project(name)
 		self.project_model.start_file_watcher(self.queue)
-		with self.precompute_file_lock: self.precomputed_prompt_cache.clear()
+		self.precomputed_prompt_cache.clear()
 		self.precomputed_file_key = None
 		
 		self.settings_model.set('last_selected_project', name)
 		
 		self._set_project_file_handler(name)
-		self.run_autoblacklist_in_background(name)
+		self._autoblacklist_pending = name
 		self.load_templates(force_refresh=True)
 		self.load_items_in_background(is_new_project=is_new_project)
 		self.prebuild_history_cache(name)
@@ -423,7 +460,8 @@ class MainController:
 	def handle_raw_template_update(self, new_data):
 		self.settings_model.set_all_templates(new_data)
 		self.settings_model.save_templates()
-		with self.precompute_file_lock: self.precomputed_prompt_cache.clear()
+		self._tpl_cache.clear()
+		self.precomputed_prompt_cache.clear()
 		self.load_templates(force_refresh=True)
 
 	# File & Item Management
@@ -536,26 +574,24 @@ class MainController:
 		if len(selected_files) > self.project_model.max_files: return show_warning_centered(self.view, "Warning", f"Selected {len(selected_files)} files. Max is {self.project_model.max_files}.")
 		if not self.project_model.is_project_path_valid(): return show_error_centered(self.view, "Error", "Project directory does not exist.")
 		
-		try: clipboard_content = self.view.clipboard_get()
-		except Exception: clipboard_content = ""
+		clipboard_content = self.get_clipboard_content()
 
+		self.project_model.update_file_contents(selected_files)
 		key = self.get_precompute_key(selected_files, template_name, clipboard_content)
 
-		with self.precompute_file_lock:
-			if not to_clipboard and self.precomputed_file_key == key and os.path.exists(self.precomputed_file_path):
-				cached_data = self.precomputed_prompt_cache.get(key)
-				if cached_data:
-					_, total_chars, oversized, truncated, sanitized_count = cached_data
-					self.finalize_precomputed_generation(self.precomputed_file_path, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)
-					return
-
-			if key in self.precomputed_prompt_cache:
-				prompt, total_chars, oversized, truncated, sanitized_count = self.precomputed_prompt_cache[key]
-				if to_clipboard:
-					self.finalize_clipboard_generation(prompt, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)
-				else:
-					self.finalize_generation(prompt, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)
-				return
+		cached_data = self._get_precomputed(key)
+		if cached_data:
+			prompt, total_chars, oversized, truncated, sanitized_count = cached_data
+			if not to_clipboard:
+				with self.precompute_file_lock:
+					if self.precomputed_file_key == key and os.path.exists(self.precomputed_file_path):
+						self.finalize_precomputed_generation(self.precomputed_file_path, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)
+						return
+			if to_clipboard:
+				self.finalize_clipboard_generation(prompt, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)
+			else:
+				self.finalize_generation(prompt, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)
+			return
 
 		self.view.set_generation_state(True, to_clipboard)
 		if template_override is None: self.project_model.set_last_used_template(template_name)
@@ -564,35 +600,57 @@ class MainController:
 		use_process_pool = total_size > (PROCESS_POOL_THRESHOLD_KB * 1024)
 
 		if use_process_pool:
-			self.background_task_pool.submit(self.generate_output_worker_process, selected_files, template_name, clipboard_content, to_clipboard)
+			self.submit_task('generation', self.generate_output_worker_process, selected_files, template_name, clipboard_content, to_clipboard)
 		else:
 			worker = self.generate_output_to_clipboard_worker if to_clipboard else self.generate_output_worker
-			self.background_task_pool.submit(worker, selected_files, template_name, clipboard_content)
+			self.submit_task('generation', worker, selected_files, template_name, clipboard_content)
 
 	def get_precompute_key(self, selected_files, template_name, clipboard_content=""):
-		h = hashlib.md5()
-		proj_id = self.project_model.current_project_id
-		if proj_id: h.update(proj_id.encode())
+		proj_id = self.project_model.current_project_id or ""
 		proj_name = self.project_model.current_project_name
-		if proj_name:
-			h.update(proj_name.encode())
-			proj_path = self.project_model.get_project_path(proj_name)
-			if proj_path: h.update(proj_path.encode())
-		for fp in sorted(selected_files):
-			h.update(fp.encode())
-			full_path = os.path.join(self.project_model.get_project_path(proj_name), fp) if proj_name else fp
-			try: mtime = os.stat(full_path).st_mtime_ns
-			except OSError: mtime = 0
-			h.update(str(mtime).encode())
-		template_content = self.settings_model.get_template_content(template_name)
-		if "{{CLIPBOARD}}" in template_content:
-			h.update(clipboard_content.encode())
-		h.update(template_name.encode())
-		h.update(template_content.encode())
-		h.update(self.settings_model.get('file_content_separator', '').encode())
-		h.update(str(self.settings_model.get('sanitize_configs_enabled', False)).encode())
+		proj_path = self._cached_proj_path(proj_name) if proj_name else None
+		parts = [proj_id.encode(), (proj_name or "").encode(), (proj_path or "").encode()]
+		parts.extend(self._get_files_key_parts(proj_path, selected_files))
+		template_content, template_bytes = self._get_template_for_key(template_name)
+		parts.append(clipboard_content.encode() if "{{CLIPBOARD}}" in template_content else b"")
+		parts.extend((template_name.encode(), template_bytes, self.settings_model.get('file_content_separator', '').encode(), str(self.settings_model.get('sanitize_configs_enabled', False)).encode()))
+		h = blake3.blake3() if blake3 else hashlib.sha256()
+		h.update(b"\x00".join(parts))
 		return h.hexdigest()
 
+	def _cached_proj_path(self, proj_name):
+		lookup = (proj_name, self.project_model.projects_version)
+		cached = self._proj_path_cache
+		if cached and cached[0] == lookup: return cached[1]
+		proj_path = self.project_model.get_project_path(proj_name)
+		self._proj_path_cache = (lookup, proj_path)
+		return proj_path
+
+	def _get_files_key_parts(self, proj_path, selected_files):
+		watching = self.project_model.is_watching()
+		files_key = (proj_path, self.project_model.mtime_epoch, tuple(selected_files))
+		cached = self._key_files_cache
+		if watching and cached and cached[0] == files_key: return cached[1]
+		cached_mtimes = self.project_model.get_cached_mtimes(selected_files) if watching else {}
+		path_prefix = os.path.join(proj_path, "") if proj_path else ""
+		ordered_files, mtimes = sorted(selected_files), []
+		for fp in ordered_files:
+			mtime = cached_mtimes.get(fp)
+			if mtime is None:
+				try: mtime = os.stat(path_prefix + fp).st_mtime_ns
+				except OSError: mtime = 0
+			mtimes.append(mtime)
+		files_parts = ("\x00".join(ordered_files).encode(), struct.pack(f"<{len(mtimes)}q", *mtimes))
+		self._key_files_cache = (files_key, files_parts)
+		return files_parts
+
+	def _get_template_for_key(self, template_name):
+		content = self.settings_model.get_template_content(template_name)
+		cached = self._tpl_cache.get(template_name)
+		if cached is None or cached[0] is not content:
+			cached = (content, content.encode()); self._tpl_cache[template_name] = cached
+		return cached
+
 	def save_and_open_notepadpp(self, content):
 		ts = datetime.now().strftime("%d.%m.%Y_%H.%M.%S")
 		proj_name = self.project_model.current_project_name or "temp"
@@ -601,7 +659,7 @@ class MainController:
 		filename = f"{safe_proj_name}_text_{ts}{file_ext}"
 		filepath = os.path.join(self.project_model.output_dir, filename)
 		try:
-			with open(filepath, 'w', encoding='utf-8') as f: f.write(unify_line_endings(content).rstrip('\n'))
+			write_unified_text(filepath, content)
 			open_in_editor(filepath)
 			self.view.set_status_temporary("Opened in editor")
 		except Exception as e: logger.error("Failed to open in editor: %s", e, exc_info=True); show_error_centered(self.view, "Error", "Failed to open in editor.")
@@ -623,8 +681,8 @@ class MainController:
 		except Exception as e:
 			logger.error(f"Failed to move precomputed file: {e}. Falling back.")
 			try:
-				with open(precomputed_path if os.path.exists(precomputed_path) else filepath, 'r', encoding='utf-8') as f: content = f.read()
-				with open(filepath, 'w', encoding='utf-8') as f: f.write(unify_line_endings(content).rstrip('\n'))
+				if os.path.exists(precomputed_path): shutil.copyfile(precomputed_path, filepath)
+				elif not os.path.exists(filepath): raise FileNotFoundError(precomputed_path)
 				self.project_model._update_outputs_metadata(os.path.basename(filepath), {"source_name": source_name, "selection": selection, "is_quick_action": False, "project_name": proj_name, "project_id": proj_id})
 				open_in_editor(filepath)
 				self.view.set_status_temporary("Opened in editor")
@@ -640,9 +698,13 @@ class MainController:
 		if is_new_project: self.project_model.project_tree_scroll_pos = 0.0
 		self.project_model.load_items_async(is_new_project, self.queue)
 
-	def run_autoblacklist_in_background(self, proj_name):
+	def run_autoblacklist_in_background(self, proj_name, items=None):
 		if self.project_model.is_autoblacklisting(): return
-		self.project_model.run_autoblacklist_async(proj_name, self.queue)
+		self.project_model.run_autoblacklist_async(proj_name, self.queue, items)
+
+	def submit_task(self, task_type, fn, *args):
+		if task_type == 'process': return self.generation_process_pool.submit(fn, *args)
+		return self.background_task_pool.submit(TASK_PRIORITIES.get(task_type, 2), fn, *args, supersede_key=task_type if task_type in SUPERSEDING_TASKS else None)
 
 	def start_precompute_worker(self):
 		self.precompute_thread = threading.Thread(target=self._precompute_worker, daemon=True)
@@ -652,23 +714,43 @@ class MainController:
 		self.periodic_save_thread = threading.Thread(target=self._periodic_save_worker, daemon=True)
 		self.periodic_save_thread.start()
 
+	def start_quick_action_worker(self):
+		self.quick_action_thread = threading.Thread(target=self._quick_action_loop, daemon=True)
+		self.quick_action_thread.start()
+
+	def _quick_action_loop(self):
+		while (item := self.quick_action_queue.get()) is not None and not self._stop_event.is_set():
+			try: self._quick_action_worker(*item)
+			except Exception as e: logger.error("Quick action loop error: %s", e, exc_info=True)
+
+	def start_output_save_worker(self):
+		self.output_save_thread = threading.Thread(target=self._output_save_loop, daemon=True)
+		self.output_save_thread.start()
+
+	def _output_save_loop(self):
+		while (item := self.output_save_queue.get()) is not None:
+			try: self.project_model.save_output_silently(*item)
+			except Exception as e: logger.error("Output save loop error: %s", e, exc_info=True)
+
+	def save_output_in_background(self, output, project_name, selection, source_name, is_quick_action):
+		if self.output_save_thread and self.output_save_thread.is_alive(): self.output_save_queue.put((output, project_name, selection, source_name, is_quick_action))
+		else: self.project_model.save_output_silently(output, project_name, selection, source_name, is_quick_action)
+
 	def _periodic_save_worker(self):
 		while not self._stop_event.wait(PERIODIC_SAVE_INTERVAL_SECONDS):
+			if not self.save_lock.acquire(timeout=0.5): continue
 			try:
-				with self.save_lock:
+				try:
 					if self._stop_event.is_set(): break
-					if self.project_model.have_projects_changed():
-						logger.info("Periodic save for project data")
-						self.project_model.save()
-					if self.settings_model.have_settings_changed():
-						logger.info("Periodic save for settings.json")
-						self.settings_model.save_settings()
-					if self.settings_model.have_templates_changed():
-						logger.info("Periodic save for templates.json")
-						self.settings_model.save_templates()
-					if self.settings_model.have_history_changed():
-						logger.info("Periodic save for history.json")
-						self.settings_model.save_history()
+					project_snapshot = self.project_model.snapshot_if_dirty()
+					dirty_files = [k for k, changed in (('settings', self.settings_model.have_settings_changed()), ('templates', self.settings_model.have_templates_changed()), ('history', self.settings_model.have_history_changed())) if changed]
+				finally: self.save_lock.release()
+				if project_snapshot:
+					logger.info("Periodic save for project data")
+					self.project_model.save_snapshot(project_snapshot)
+				for file_key in dirty_files:
+					logger.info("Periodic save for %s.json", file_key)
+					getattr(self.settings_model, f"save_{file_key}")()
 			except Timeout:
 				msg = "Periodic save failed: could not get a file lock. Your changes may not be saved. Please try saving manually or restarting the app."
 				logger.error(msg)
@@ -706,7 +788,7 @@ class MainController:
 					self.history_render_cache[proj_id] = prepared
 			except Exception as e:
 				logger.error("History cache build failed: %s", e, exc_info=True)
-		self.background_task_pool.submit(_worker, proj)
+		self.submit_task('history_cache', _worker, proj)
 
 	def get_history_render_cache(self, proj_name=None):
 		p = proj_name or self.project_model.current_project_name
@@ -717,51 +799,76 @@ class MainController:
 
 	def _precompute_worker(self):
 		while not self._stop_event.is_set():
-			self.precompute_request.wait(timeout=1.0)
-			if self._stop_event.is_set(): break
-			if not self.precompute_request.is_set(): continue
+			with self.precompute_cv:
+				self.precompute_cv.wait_for(lambda: self.precompute_pending or self._stop_event.is_set())
+				if self._stop_event.is_set(): break
+				self.precompute_pending = False
 			with self.is_precomputing:
-				self.precompute_request.clear()
 				if not self.project_model.current_project_name: continue
 				with self.precompute_args_lock:
 					selected_files, template_name, clipboard_content = self.precompute_args
 				if template_name is None: continue
-				key = self.get_precompute_key(selected_files, template_name, clipboard_content)
 				try:
 					total_size = sum(self.project_model.file_char_counts.get(f, 0) for f in selected_files)
 					use_process_pool = total_size > (PROCESS_POOL_THRESHOLD_KB * 1024)
 					if use_process_pool:
+						self.project_model.update_file_contents(selected_files)
+						key = self.get_precompute_key(selected_files, template_name, clipboard_content)
 						dir_tree = self.project_model.generate_directory_tree_custom()
 						template_content = self.settings_model.get_template_content(template_name)
 						project_prefix = self.project_model.get_project_data(self.project_model.current_project_name, "prefix", "")
-						model_config = self.project_model.get_config_for_simulation()
+						model_config = self.project_model.get_config_for_simulation(selected_files)
 						file_separator_template = self.settings_model.get('file_content_separator', '--- {path} ---\n{contents}\n--- {path} ---')
 						args = (selected_files, template_content, clipboard_content, dir_tree, project_prefix, model_config, file_separator_template)
-						fut = self.generation_process_pool.submit(process_pool_worker, args)
+						fut = self.submit_task('process', process_pool_worker, args)
 						prompt, total_chars, oversized, truncated, sanitized_count = fut.result(timeout=60)
 					else:
 						self.project_model.update_file_contents(selected_files)
+						key = self.get_precompute_key(selected_files, template_name, clipboard_content)
 						prompt, total_chars, oversized, truncated, sanitized_count = self.project_model.simulate_final_prompt(selected_files, template_name, clipboard_content)
+					tmp_path = f"{self.precomputed_file_path}.{os.getpid()}.tmp"
+					try:
+						write_unified_text(tmp_path, prompt)
+					except Exception as e:
+						logger.error(f"Failed to write precompute file: {e}")
+						tmp_path = None
+					self._store_precomputed(key, (prompt, total_chars, oversized, truncated, sanitized_count))
 					with self.precompute_file_lock:
-						if len(self.precomputed_prompt_cache) > 20: self.precomputed_prompt_cache.clear()
-						self.precomputed_prompt_cache[key] = (prompt, total_chars, oversized, truncated, sanitized_count)
-						try:
-							with open(self.precomputed_file_path, 'w', encoding='utf-8') as f: f.write(unify_line_endings(prompt).rstrip('\n'))
-							self.precomputed_file_key = key
-						except Exception as e:
-							logger.error(f"Failed to write precompute file: {e}")
-							self.precomputed_file_key = None
+						self.precomputed_file_key = None
+						if tmp_path:
+							try:
+								replace_with_retry(tmp_path, self.precomputed_file_path)
+								self.precomputed_file_key = key
+							except OSError as e:
+								logger.error(f"Failed to replace precompute file: {e}")
+								try: os.remove(tmp_path)
+								except OSError: pass
 					self.queue.put(('char_count_done', (len(selected_files), len(prompt))))
 				except Exception as e:
 					logger.error("Precompute worker failed: %s", e, exc_info=True)
 
+	def _get_precomputed(self, key):
+		cached = self.precomputed_prompt_cache.get(key)
+		if cached:
+			try: self.precomputed_prompt_cache.move_to_end(key)
+			except KeyError: pass
+		return cached
+
+	def _store_precomputed(self, key, value):
+		cache = self.precomputed_prompt_cache
+		cache[key] = value
+		try: cache.move_to_end(key)
+		except KeyError: pass
+		while len(cache) > self.PRECOMPUTE_CACHE_MAX_ENTRIES:
+			try: cache.popitem(last=False)
+			except KeyError: break
+
 	def char_count_worker(self, selected_files, template_name, clipboard_content, request_token):
 		try:
 			if self.char_count_token != request_token: return
 			if not self.project_model.current_project_name: return
 			key = self.get_precompute_key(selected_files, template_name, clipboard_content)
-			with self.precompute_file_lock:
-				cached = self.precomputed_prompt_cache.get(key)
+			cached = self.precomputed_prompt_cache.get(key)
 			if cached:
 				prompt_len = len(cached[0])
 				if self.char_count_token == request_token: self.queue.put(('char_count_done', (len(selected_files), prompt_len)))
@@ -800,43 +907,37 @@ class MainController:
 			dir_tree = self.project_model.generate_directory_tree_custom()
 			template_content = self.settings_model.get_template_content(template_name)
 			project_prefix = self.project_model.get_project_data(self.project_model.current_project_name, "prefix", "")
-			model_config = self.project_model.get_config_for_simulation()
+			model_config = self.project_model.get_config_for_simulation(selected_files)
 			file_separator_template = self.settings_model.get('file_content_separator', '--- {path} ---\n{contents}\n--- {path} ---')
 			
 			args = (selected_files, template_content, clipboard_content, dir_tree, project_prefix, model_config, file_separator_template)
-			future = self.generation_process_pool.submit(process_pool_worker, args)
-			prompt, total_chars, oversized, truncated, sanitized_count = future.result(timeout=60)
+			future = self.submit_task('process', process_pool_worker, args)
+			future.add_done_callback(lambda f: self._on_process_generation_done(f, selected_files, template_name, to_clipboard))
+		except Exception as e:
+			logger.error("Error in process pool generation: %s", e, exc_info=True)
+			self.queue.put(('error', "Error in process pool generation."))
 
-			if to_clipboard:
-				self.queue.put(('copy_and_save_silently', (prompt, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)))
-			else:
-				self.queue.put(('save_and_open', (prompt, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)))
+	def _on_process_generation_done(self, future, selected_files, template_name, to_clipboard):
+		try: prompt, total_chars, oversized, truncated, sanitized_count = future.result()
 		except Exception as e:
 			logger.error("Error in process pool generation: %s", e, exc_info=True)
 			self.queue.put(('error', "Error in process pool generation."))
+			return
+		self.queue.put(('copy_and_save_silently' if to_clipboard else 'save_and_open', (prompt, selected_files, total_chars, oversized, truncated, template_name, sanitized_count)))
 
 	def _quick_action_worker(self, val, clip_in):
 		project_name = self.project_model.current_project_name or "ClipboardAction"
 		selected_files = self.project_model.get_selected_files()
-		op_map = {
-			"Truncate Between '---'": self.process_truncate_format,
-			"Replace \"**\"": lambda t: (self._extended_text_cleaning(t), "Cleaned text and copied"),
-			"Gemini Whitespace Fix": lambda t: (t.replace('\u00A0', ' '), "Fixed whitespace and copied"),
-			"Remove Duplicates": lambda t: ('\n'.join(dict.fromkeys(t.rstrip('\n').split('\n'))), "Removed duplicates and copied"),
-			"Sort Alphabetically": lambda t: ('\n'.join(sorted(t.rstrip('\n').split('\n'))), "Sorted alphabetically and copied"),
-			"Sort by Length": lambda t: ('\n'.join(sorted(t.rstrip('\n').split('\n'), key=len)), "Sorted by length and copied"),
-			"Escape Text": lambda t: (safe_escape(t.rstrip('\n')), "Escaped text and copied"),
-			"Unescape Text": lambda t: (safe_unescape(t.rstrip('\n')), "Unescaped text and copied")
-		}
 		try:
-			if val in op_map:
-				new_clip, msg = op_map[val](clip_in)
+			op = QUICK_OPS.get(val)
+			if op:
+				new_clip, msg = op(self, clip_in)
 				new_clip = new_clip.strip()
-				self.project_model.save_output_silently(new_clip, project_name, selected_files, val, is_quick_action=True)
+				self.save_output_in_background(new_clip, project_name, selected_files, val, True)
 				self.queue.put(('quick_action_done', (new_clip, msg)))
-			elif self.settings_model.is_template(val) and "{{CLIPBOARD}}" in self.settings_model.get_template_content(val):
-				content = self.settings_model.get_template_content(val).replace("{{CLIPBOARD}}", clip_in).strip()
-				self.project_model.save_output_silently(content, project_name, selected_files, val, is_quick_action=True)
+			elif "{{CLIPBOARD}}" in (template_content := self.settings_model.get_template_content(val)):
+				content = template_content.replace("{{CLIPBOARD}}", clip_in).strip()
+				self.save_output_in_background(content, project_name, selected_files, val, True)
 				self.queue.put(('quick_action_done', (content, "Copied to clipboard")))
 		except Exception as e:
 			logger.error("Quick action '%s' failed: %s", val, e)
@@ -867,19 +968,20 @@ class MainController:
 	def handle_file_selection_change(self, *a):
 		selected_files = self.project_model.get_selected_files()
 		
-		try: clipboard_content = self.view.clipboard_get()
-		except Exception: clipboard_content = ""
+		clipboard_content = self.get_clipboard_content()
 		template_name = self.view.template_var.get()
 		key = self.get_precompute_key(selected_files, template_name, clipboard_content)
 		
-		with self.precompute_file_lock:
-			if key in self.precomputed_prompt_cache:
-				prompt, _, _, _, _ = self.precomputed_prompt_cache[key]
-				self.view.update_selection_count_label(len(selected_files), format_german_thousand_sep(len(prompt)))
-			else:
-				self.view.update_selection_count_label(len(selected_files), "Calculating...")
-				self.char_count_token += 1
-				self.char_count_executor.submit(self.char_count_worker, selected_files, template_name, clipboard_content, self.char_count_token)
+		cached = self.precomputed_prompt_cache.get(key)
+		if cached:
+			prompt = cached[0]
+			self._last_count_display = (len(selected_files), len(prompt))
+			self.view.update_selection_count_label(len(selected_files), format_german_thousand_sep(len(prompt)))
+		else:
+			self._last_count_display = None
+			self.view.update_selection_count_label(len(selected_files), "Calculating...")
+			self.char_count_token += 1
+			self.submit_task('char_count', self.char_count_worker, selected_files, template_name, clipboard_content, self.char_count_token)
 		
 		self.view.refresh_selected_files_list(selected_files)
 		self.view.update_select_all_button()
@@ -897,13 +999,9 @@ class MainController:
 		if val in self.custom_scripts.registry:
 			self.run_custom_script(val)
 			return
-		try: clip_in = self.view.clipboard_get()
-		except Exception: clip_in = ""
-		if self.quick_action_semaphore.acquire(blocking=False):
-			future = self.background_task_pool.submit(self._quick_action_worker, val, clip_in)
-			future.add_done_callback(lambda f: self.quick_action_semaphore.release())
-		else:
-			self.queue.put(('set_status_temporary', ('Busy – please wait',)))
+		clip_in = self.get_clipboard_content()
+		try: self.quick_action_queue.put_nowait((val, clip_in))
+		except queue.Full: self.queue.put(('set_status_temporary', ('Busy – please wait',)))
 
 	def add_to_blacklist(self, folder_path):
 		proj_name = self.project_model.current_project_name
@@ -937,9 +1035,11 @@ class MainController:
 	# Queue Processing & UI Updates
 	# ------------------------------
 	def process_queue(self):
+		processed = False
 		try:
 			while True:
 				task, data = self.queue.get_nowait()
+				processed = True
 				if task == 'save_and_open': self.finalize_generation(*data)
 				elif task == 'copy_and_save_silently': self.finalize_clipboard_generation(*data)
 				elif task == 'silent_refresh': self.refresh_files(is_manual=False)
@@ -950,7 +1050,7 @@ class MainController:
 					should_unlock = True
 					try:
 						status, result, is_new_project, result_project_id = data
-						if result_project_id != self.project_model.current_project_id: continue
+						if status == "cancelled" or result_project_id != self.project_model.current_project_id: continue
 						self.view.item_size_cache.clear()
 						if status == "error":
 							proj_name = self.project_model.current_project_name
@@ -967,7 +1067,7 @@ class MainController:
 										else:
 											if self.project_model.rename_project(current_proj_name, new_folder_name):
 												current_proj_name = new_folder_name
-												logger.info(f"Project renamed from '{proj_name}' to '{new_folder_name}' due to relocation.")
+												logger.info("Project renamed from '%s' to '%s' due to relocation.", proj_name, new_folder_name)
 											else:
 												show_error_centered(self, "Rename Failed", f"Failed to rename project configuration to '{new_folder_name}'. Updating path for '{current_proj_name}'. Check logs.")
 									self.project_model.update_project(current_proj_name, {"path": new_path})
@@ -986,13 +1086,12 @@ class MainController:
 									continue
 							if action == "no":
 								self.remove_project(project_name_to_remove=proj_name, skip_confirmation=True)
-							self.project_model.all_items = []
-							self.project_model.filtered_items = []
+							self.project_model.set_items(())
 							self.view.clear_project_view()
 						else:
 							found_items, limit_exceeded = result
+							self.precomputed_prompt_cache.clear()
 							with self.precompute_file_lock:
-								self.precomputed_prompt_cache.clear()
 								self.precomputed_file_key = None
 								try: os.remove(self.precomputed_file_path)
 								except Exception: pass
@@ -1001,7 +1100,7 @@ class MainController:
 							removed_files = current_selection - existing_files
 							if removed_files:
 								self.project_model.set_selection(current_selection - removed_files)
-								logger.info(f"Silently unselected {len(removed_files)} files that no longer exist: {sorted(list(removed_files))}")
+								if logger.isEnabledFor(logging.INFO): logger.info("Silently unselected %d files that no longer exist: %s", len(removed_files), sorted(removed_files))
 								if not self.view.is_silent_refresh:
 									self.view.set_status_temporary(f"Project files updated; {len(removed_files)} missing file(s) unselected.")
 							self.project_model.set_items(found_items)
@@ -1009,6 +1108,9 @@ class MainController:
 							self.project_model._initialize_file_data(found_items)
 							threading.Thread(target=self.project_model._load_all_file_contents_and_sizes_worker, args=(self.queue,), daemon=True).start()
 							proj_name = self.project_model.current_project_name
+							if proj_name and self._autoblacklist_pending == proj_name:
+								self._autoblacklist_pending = None
+								self.run_autoblacklist_in_background(proj_name, None if limit_exceeded else found_items)
 							scroll_pos = 0.0
 							if proj_name and not is_new_project:
 								ui_state = self.project_model.get_project_ui_state(proj_name)
@@ -1028,6 +1130,8 @@ class MainController:
 				elif task == 'auto_bl': self.on_auto_blacklist_done(data[0], data[1])
 				elif task == 'char_count_done':
 					file_count, prompt_chars = data
+					if self._last_count_display == (file_count, prompt_chars): continue
+					self._last_count_display = (file_count, prompt_chars)
 					self.view.update_selection_count_label(
 						file_count,
 						format_german_thousand_sep(prompt_chars) if prompt_chars >= 0 else "Error"
@@ -1035,8 +1139,8 @@ class MainController:
 				elif task == 'file_contents_loaded':
 					proj_name = data
 					if proj_name == self.project_model.current_project_name:
+						self.precomputed_prompt_cache.clear()
 						with self.precompute_file_lock:
-							self.precomputed_prompt_cache.clear()
 							self.precomputed_file_key = None
 							try: os.remove(self.precomputed_file_path)
 							except Exception: pass
@@ -1060,6 +1164,7 @@ class MainController:
 				elif task == 'reload_templates':
 					logger.info("External change in templates.json, reloading.")
 					self.settings_model.load_templates()
+					self._tpl_cache.clear()
 					self.load_templates(force_refresh=True)
 				elif task == 'reload_history':
 					logger.info("External change in history.json, reloading.")
@@ -1091,7 +1196,8 @@ class MainController:
 				elif task == 'custom_script_error':
 					show_error_centered(self.view, "Error", data)
 		except queue.Empty: pass
-		if self.view and self.view.winfo_exists(): self.view.after(50, self.process_queue)
+		self._idle_streak = 0 if processed else min(self._idle_streak + 1, 7)
+		if self.view and self.view.winfo_exists(): self.view.after(1 if processed else min(100, 2 ** self._idle_streak), self.process_queue)
 
 	def finalize_generation(self, output, selection, char_count, oversized, truncated, source_name, sanitized_count):
 		self.project_model.update_project_usage()
@@ -1120,7 +1226,7 @@ class MainController:
 		self.update_projects_list()
 		self.view.update_clipboard(output)
 		self.view.set_status_temporary("Copied to clipboard.")
-		self.project_model.save_output_silently(output, self.project_model.current_project_name, selection, source_name, is_quick_action=False)
+		self.save_output_in_background(output, self.project_model.current_project_name, selection, source_name, False)
 		self.view.set_generation_state(False)
 		if sanitized_count > 0: self.view.set_status_temporary(f"Sanitized {sanitized_count} files.", duration=4000)
 		project_id = self.project_model.current_project_id
@@ -1150,56 +1256,49 @@ class MainController:
 			self.project_model.set_project_ui_state(proj_name, ui_state)
 		except (AttributeError, TclError) as e:
 			logger.warning(f"Could not capture project state for '{proj_name}': {e}")
+	def get_clipboard_content(self):
+		now = time.monotonic()
+		if now - self._clip_ts < 0.05: return self._clip_val
+		try: value = self.view.clipboard_get()
+		except Exception: value = ""
+		self._clip_val, self._clip_ts = value, now
+		return value
+
+	def invalidate_clipboard_cache(self): self._clip_ts = float('-inf')
+
 	def request_precomputation(self):
+		if not self.view or not self.view.winfo_exists(): return
+		if self._precompute_after: self.view.after_cancel(self._precompute_after)
+		self._precompute_after = self.view.after(self.PRECOMPUTE_DEBOUNCE_MS, self._fire_precomputation)
+
+	def _fire_precomputation(self):
+		self._precompute_after = None
 		if not self.view or not self.view.winfo_exists(): return
 		template_name = self.view.template_var.get()
-		try:
-			clipboard_content = self.view.clipboard_get()
-		except Exception:
-			clipboard_content = ""
-		
+		clipboard_content = self.get_clipboard_content()
 		selected_files = self.project_model.get_selected_files()
 		precompute_context = (selected_files, template_name, clipboard_content)
 
 		with self.precompute_args_lock:
 			self.precompute_args = precompute_context
-		self.precompute_request.set()
+		with self.precompute_cv:
+			self.precompute_pending = True
+			self.precompute_cv.notify()
 
 	def _extended_text_cleaning(self, text):
-		lines = text.split('\n')
-		output_lines, in_fenced_code = [], False
-		for line in lines:
-			s = line.rstrip('\r')
-			if s.startswith('> '): s = s[2:]
-			elif s.strip() == '>': s = ''
-			if s.startswith('```'):
-				in_fenced_code = not in_fenced_code; output_lines.append(s); continue
-			if in_fenced_code or s.startswith(' '):
-				output_lines.append(s); continue
-			parts = self.FENCED_CODE_SPLIT_RE.split(s)
-			processed_line = "".join([part if i % 2 == 1 else part.replace('**', '') for i, part in enumerate(parts)])
-			output_lines.append(processed_line)
-		return '\n'.join(output_lines)
+		if '>' in text or '\r' in text: text = BLOCKQUOTE_RE.sub('', text)
+		return CLEAN_RE.sub(lambda m: '' if m.group() == '**' else m.group(), text)
 
 	def process_truncate_format(self, text):
-		text = unify_line_endings(text)
-		text = self._extended_text_cleaning(text)
-		lines = text.split('\n')
-		delim_idx = []
-		in_fenced_code = False
-		for i, line in enumerate(lines):
-			if line.strip().startswith('```'): in_fenced_code = not in_fenced_code
-			if not in_fenced_code and self.DELIMITER_RE.match(line): delim_idx.append(i)
-
-		between = False
-		if len(delim_idx) >= 2:
-			between = True
-			lines = lines[delim_idx[0] + 1:delim_idx[-1]]
-		while lines and not lines[0].strip(): lines.pop(0)
-		while lines and not lines[-1].strip(): lines.pop()
-		final_text = '\n'.join(lines)
+		text = self._extended_text_cleaning(unify_line_endings(text))
+		delims = [m for m in TRUNCATE_SCAN_RE.finditer(text) if m.group(1) is not None]
+		between = len(delims) >= 2
+		if between: text = text[delims[0].end() + 1:delims[-1].start() - 1]
+		content_end = len(text.rstrip())
+		line_end = text.find('\n', content_end)
+		final_text = text[text.rfind('\n', 0, len(text) - len(text.lstrip())) + 1:line_end if line_end != -1 else len(text)] if content_end else ""
 		char_cnt = len(final_text)
-		notification = f"✅ Copied {char_cnt} chars (between delimiters)" if between else f"ℹ️ {'Only one' if len(delim_idx) == 1 else 'No'} '---' found – copied whole document ({char_cnt} chars)."
+		notification = f"✅ Copied {char_cnt} chars (between delimiters)" if between else f"ℹ️ {'Only one' if len(delims) == 1 else 'No'} '---' found – copied whole document ({char_cnt} chars)."
 		return final_text, notification
 
 	def _check_and_warn_for_omissions(self, oversized, truncated):
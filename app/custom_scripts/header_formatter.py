@@ -1,7 +1,7 @@
 # File: app/custom_scripts/header_formatter.py
 # LLM NOTE: LLM Editor, follow these code style guidelines: (1) No docstrings or extra comments; (2) Retain the file path comment, LLM note, and grouping/separation markers exactly as is; (3) Favor concise single-line statements; (4) Preserve code structure and organization.
 
-import os, json
+import os, re, json, functools, concurrent.futures
 from pathlib import Path
 from app.config import get_logger
 
@@ -39,94 +39,61 @@ def _validate_cfg(cfg):
 		if "token" not in c and not ("token_start" in c and "token_end" in c): return False
 	return True
 
-def _find_content_start(lines, ext, cfg):
-	if ext == ".js":
-		token = cfg.get("token", "//"); bs = cfg.get("block_start", "/*"); be = cfg.get("block_end", "*/")
-		in_block = False
-		for i, ln in enumerate(lines):
-			s = ln.strip()
-			if not s: continue
-			if in_block:
-				if be in s: in_block = False
-				continue
-			if s.startswith(token): continue
-			if s.startswith(bs):
-				if be not in s: in_block = True
-				continue
-			return i
-		return len(lines)
-	if ext == ".ejs":
-		in_html = False; in_ejs = False
-		for i, ln in enumerate(lines):
-			s = ln.strip()
-			if not s: continue
-			if in_html:
-				if "-->" in s: in_html = False
-				continue
-			if in_ejs:
-				if "%>" in s: in_ejs = False
-				continue
-			if s.startswith("<!--"):
-				if "-->" not in s: in_html = True
-				continue
-			if s.startswith("<%#"):
-				if "%>" not in s: in_ejs = True
-				continue
-			return i
-		return len(lines)
-	comment_marker = cfg.get("token") or cfg.get("token_start")
-	for i, ln in enumerate(lines):
-		s = ln.strip()
-		if not s or (comment_marker and s.startswith(comment_marker)): continue
-		return i
-	return len(lines)
-
-def _build_header(relative_path, c):
-	h = []
-	if "token" in c:
-		h.append(f"{c['token']} File: {relative_path}\n")
-		h.append(f"{c['token']} {c['llm_note']}\n")
-	else:
-		start, end = c['token_start'], c['token_end']
-		h.append(f"{start} FILE: {relative_path} {end}\n")
-		h.append(f"{start} {c['llm_note']} {end}\n")
-	return h
-
-def _process_one(abs_path, rel_path, root_dir, header_cfg):
+def _block_alt(bs, be):
+	bs, be = re.escape(bs), re.escape(be)
+	return rf"(?=[^\S\n]*{bs})(?:(?=[^\n]*{be})[^\n]*(?:\n|\Z)|[^\n]*(?:\n(?![^\n]*{be})[^\n]*)*(?:\n[^\n]*(?:\n|\Z)|\Z))"
+
+@functools.lru_cache(maxsize=64)
+def _leading_comments_re(kind, token=None, bs=None, be=None):
+	alts = [r"[^\S\n]*(?:\n|\Z)"]
+	if kind == ".js": alts += [rf"[^\S\n]*{re.escape(token)}[^\n]*(?:\n|\Z)", _block_alt(bs, be)]
+	elif kind == ".ejs": alts += [_block_alt("<!--", "-->"), _block_alt("<%#", "%>")]
+	elif token: alts.append(rf"[^\S\n]*{re.escape(token)}[^\n]*(?:\n|\Z)")
+	return re.compile("(?:" + "|".join(alts) + ")*")
+
+def _find_content_start(text, ext, cfg):
+	if ext == ".js": pat = _leading_comments_re(ext, cfg.get("token", "//"), cfg.get("block_start", "/*"), cfg.get("block_end", "*/"))
+	elif ext == ".ejs": pat = _leading_comments_re(ext)
+	else: pat = _leading_comments_re("", cfg.get("token") or cfg.get("token_start"))
+	return pat.match(text).end()
+
+def _build_header_parts(c):
+	if "token" in c: return f"{c['token']} File: ", f"\n{c['token']} {c['llm_note']}\n\n"
+	start, end = c['token_start'], c['token_end']
+	return f"{start} FILE: ", f" {end}\n{start} {c['llm_note']} {end}\n\n"
+
+def _process_one(abs_path, rel_path, root_dir, header_cfg, header_parts=None):
 	try:
 		with open(abs_path, 'r', encoding='utf-8-sig') as f:
-			lines = f.readlines()
+			text = f.read()
 	except UnicodeDecodeError:
 		return {"changed": False, "ws": 0, "skipped": True, "reason": "non-utf8"}, None
 	except Exception as e:
 		return {"changed": False, "ws": 0, "skipped": True, "reason": str(e)}, None
 
-	ws_count = sum(ln.count(SPECIAL_WS) for ln in lines)
-	if ws_count: lines = [ln.replace(SPECIAL_WS, " ") for ln in lines]
+	ws_count = text.count(SPECIAL_WS)
+	if ws_count: text = text.replace(SPECIAL_WS, " ")
 
 	ext = Path(abs_path).suffix.lower()
 	if ext not in header_cfg:
 		if ws_count:
 			try:
-				with open(abs_path, 'w', encoding='utf-8', newline='') as f: f.writelines(lines)
+				with open(abs_path, 'w', encoding='utf-8', newline='') as f: f.write(text)
 				return {"changed": True, "ws": ws_count, "skipped": False}, None
 			except Exception as e:
 				return {"changed": False, "ws": ws_count, "skipped": True, "reason": str(e)}, None
 		return {"changed": False, "ws": 0, "skipped": False}, None
 
 	cfg = header_cfg[ext]
-	first_idx = _find_content_start(lines, ext, cfg)
-	body = lines[first_idx:]
-	header = _build_header(rel_path, cfg)
-	new_lines = header + ["\n"] + body
-
-	orig_text = "".join(lines)
-	new_text = "".join(new_lines)
-	if orig_text == new_text and not ws_count:
+	content_start = _find_content_start(text, ext, cfg)
+	prefix, suffix = header_parts[ext] if header_parts else _build_header_parts(cfg)
+	header_text = prefix + rel_path + suffix
+	if not ws_count and content_start == len(header_text) and text.startswith(header_text):
 		return {"changed": False, "ws": 0, "skipped": False}, None
+	new_text = header_text + text[content_start:]
 
 	try:
-		with open(abs_path, 'w', encoding='utf-8', newline='') as f: f.writelines(new_lines)
+		with open(abs_path, 'w', encoding='utf-8', newline='') as f: f.write(new_text)
 		return {"changed": True, "ws": ws_count, "skipped": False}, None
 	except Exception as e:
 		return {"changed": False, "ws": ws_count, "skipped": True, "reason": str(e)}, None
@@ -136,6 +103,8 @@ def _process_one(abs_path, rel_path, root_dir, header_cfg):
 class HeaderFormatterScript:
 	def __init__(self, controller):
 		self.controller = controller
+		self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 1) * 4))
+		self._clean_stats = {}
 
 	def _load_header_config(self, project_root):
 		settings = self.controller.settings_model
@@ -189,12 +158,33 @@ class HeaderFormatterScript:
 		ws_total = 0
 		skipped = 0
 
-		for rp in visible_relative_paths:
+		cfg_sig = json.dumps(cfg, sort_keys=True)
+		header_parts = {ext: _build_header_parts(c) for ext, c in cfg.items()}
+		def _scan_dir(rel_dir):
+			try:
+				with os.scandir(os.path.join(root_dir, rel_dir)) as it: return {e.name: e for e in it}
+			except OSError: return {}
+		rel_dirs = list(dict.fromkeys(os.path.dirname(rp) for rp in visible_relative_paths))
+		dir_entries = dict(zip(rel_dirs, self._pool.map(_scan_dir, rel_dirs)))
+
+		def _run_one(rp):
 			abs_path = os.path.join(root_dir, rp)
-			if not os.path.isfile(abs_path): 
+			entry = dir_entries[os.path.dirname(rp)].get(os.path.basename(rp))
+			try:
+				if entry is None or not entry.is_file(): return None
+				st = entry.stat()
+			except OSError: return None
+			if self._clean_stats.get(abs_path) == (st.st_mtime_ns, st.st_size, cfg_sig, rp): return {"changed": False, "ws": 0, "skipped": False}
+			stats = _process_one(abs_path, rp.replace("\\", "/"), root_dir, cfg, header_parts)[0]
+			if not stats.get("skipped"):
+				try: st = os.stat(abs_path); self._clean_stats[abs_path] = (st.st_mtime_ns, st.st_size, cfg_sig, rp)
+				except OSError: self._clean_stats.pop(abs_path, None)
+			return stats
+
+		for rp, stats in zip(visible_relative_paths, self._pool.map(_run_one, visible_relative_paths)):
+			if stats is None:
 				warnings.append(f"Missing file: {rp}")
 				continue
-			stats, _ = _process_one(abs_path, rp.replace("\\", "/"), root_dir, cfg)
 			if stats.get("skipped"): 
 				skipped += 1
 				reason = stats.get("reason")
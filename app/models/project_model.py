@@ -2,7 +2,7 @@
 # LLM NOTE: LLM Editor, follow these code style guidelines: (1) No docstrings or extra comments; (2) Retain the file path comment, LLM note, and grouping/separation markers exactly as is; (3) Favor concise single-line statements; (4) Preserve code structure and organization.
 
 import shutil
-import os, time, threading, copy, tkinter as tk, concurrent.futures, itertools, json, hashlib, re, uuid
+import os, io, sys, stat, time, threading, copy, tkinter as tk, concurrent.futures, itertools, json, hashlib, re, uuid, functools, collections, operator
 import traceback
 try:
 	from watchdog.observers import Observer
@@ -10,17 +10,77 @@ try:
 except ImportError:
 	Observer = None
 	FileSystemEventHandler = object
+try: from fastrlock.rlock import FastRLock
+except ImportError: FastRLock = threading.RLock
+import app.config
 from app.config import get_logger, PROJECTS_DIR, OUTPUT_DIR, MAX_FILES, MAX_CONTENT_SIZE, MAX_FILE_SIZE, FILE_WATCHER_INTERVAL_MS, LAST_OWN_WRITE_TIMES, LAST_OWN_WRITE_TIMES_LOCK
-from app.utils.file_io import load_json_safely, atomic_write_with_backup, safe_read_file
-from app.utils.path_utils import parse_gitignore, path_should_be_ignored, normalize_path
-from app.utils.system_utils import open_in_editor, unify_line_endings
+from app.utils.file_io import load_json_safely, atomic_write_with_backup, safe_read_file, read_text_unified, write_text_atomic, append_json_log
+from app.utils.path_utils import parse_gitignore, compile_ignore_matcher, normalize_path
+from app.utils.system_utils import open_in_editor, DebounceScheduler
 from app.utils.migration_utils import get_safe_project_foldername
 from app.utils.sanitizer import sanitize_content
 from datetime import datetime
-from filelock import Timeout, FileLock
+from filelock import Timeout
 
 logger = get_logger(__name__)
 
+# Pattern Caches
+# ------------------------------
+_gitignore_cache = {} # { gitignore_path: (mtime_ns, patterns) }
+
+def _cached_gitignore(proj_path):
+	path = os.path.join(proj_path, '.gitignore')
+	try: mtime = os.stat(path).st_mtime_ns
+	except OSError: _gitignore_cache.pop(path, None); return ()
+	hit = _gitignore_cache.get(path)
+	if hit and hit[0] == mtime: return hit[1]
+	patterns = tuple(parse_gitignore(path)); _gitignore_cache[path] = (mtime, patterns)
+	return patterns
+
+@functools.lru_cache(maxsize=32)
+def _lowered_patterns(patterns): return tuple(dict.fromkeys(p.strip().lower().replace("\\", "/") for p in patterns))
+
+@functools.lru_cache(maxsize=8)
+def _compiled_matcher(respect_git, git_patterns, keep_patterns, blacklist_patterns): return compile_ignore_matcher(respect_git, git_patterns, keep_patterns, blacklist_patterns)
+
+@functools.lru_cache(maxsize=8)
+def _substring_matcher(patterns):
+	if not patterns: return None
+	return re.compile("|".join(map(re.escape, dict.fromkeys(patterns)))).search
+
+def _project_ignore_matcher(proj_path, respect_git, keep_patterns, blacklist_patterns):
+	return _compiled_matcher(respect_git, _cached_gitignore(proj_path) if respect_git else (), _lowered_patterns(tuple(keep_patterns)), _lowered_patterns(tuple(blacklist_patterns)))
+
+# Filesystem Helpers
+# ------------------------------
+_SCAN_BY_FD = os.scandir in os.supports_fd
+
+def _scan_dir_stats(dir_path, names):
+	found = {}
+	try:
+		dir_fd = os.open(dir_path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0)) if _SCAN_BY_FD else None
+		try:
+			with os.scandir(dir_path if dir_fd is None else dir_fd) as it:
+				for entry in it:
+					if entry.name in names:
+						try: found[entry.name] = entry.stat()
+						except OSError: pass
+		finally:
+			if dir_fd is not None: os.close(dir_fd)
+	except OSError: pass
+	return found
+
+# Generation Constants
+# ------------------------------
+LANG_MAP = {
+	'.py': 'python', '.js': 'javascript', '.ts': 'typescript', '.html': 'html', '.css': 'css', '.scss': 'scss', '.json': 'json', '.xml': 'xml', '.yaml': 'yaml', '.yml': 'yaml', '.md': 'markdown', '.java': 'java', '.cs': 'csharp', '.cpp': 'cpp', '.c': 'c', '.h': 'c', '.hpp': 'cpp', '.go': 'go', '.rs': 'rust', '.php': 'php', '.rb': 'ruby', '.sh': 'bash', '.ps1': 'powershell', '.sql': 'sql', '.dockerignore': 'dockerignore', 'Dockerfile': 'dockerfile'
+}
+
+@functools.lru_cache(maxsize=32)
+def _section_headings(prefix):
+	heading = f"### {prefix} " if prefix else "### "
+	return heading + "File Structure", heading + "Code Files provided", heading + "Code Files"
+
 # Project Model
 # ------------------------------
 class ProjectModel:
@@ -35,25 +95,33 @@ class ProjectModel:
 		self.max_files, self.max_content_size, self.max_file_size = MAX_FILES, MAX_CONTENT_SIZE, MAX_FILE_SIZE
 		self.projects = {} # { project_name: { data ... } }
 		self.project_name_to_path = {} # { project_name: "path/to/project.json" }
-		self.projects_lock = threading.RLock()
-		self.baseline_projects = {}
+		self.projects_lock = FastRLock()
+		self._baseline_digests = {} # { project_name: blake2b digest of canonical JSON }
 		self.current_project_name = None
 		self.current_project_id = None
-		self.all_items, self.filtered_items = [], []
+		self._scan_generation = 0
+		self.all_items, self.filtered_items = (), ()
 		self.selection_by_id = {} # { project_id: set(paths) }
+		self.selection_version, self._sorted_selection_cache = 0, None
 		self.file_mtimes, self.file_contents, self.file_char_counts = {}, {}, {}
+		self.mtime_epoch, self.projects_version = 0, 0
+		self._sorted_projects_cache = (None, None, ())
+		self._fs_event_epoch, self._stat_verified = 0, (None, frozenset())
 		self.project_tree_scroll_pos = 0.0
-		self.directory_tree_cache = None
+		self.directory_tree_cache, self.items_version = None, 0 # directory_tree_cache: (key, tree_text)
+		self._dirtree_memo = {}
 		self._loading_thread, self._autoblacklist_thread, self._poll_thread = None, None, None
 		self._observer, self._bulk_update_active = None, False
 		self._items_lock, self._file_content_lock = threading.Lock(), threading.Lock()
 		self._file_watcher_queue = None
 		self._stop_event = threading.Event()
-		self.MAX_IO_WORKERS = min(8, (os.cpu_count() or 1))
+		self.MAX_IO_WORKERS = app.config.MAX_IO_WORKERS
 		self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.MAX_IO_WORKERS)
 		self.FILE_TOO_LARGE_SENTINEL = "<FILE TOO LARGE – SKIPPED>"
 		self.project_file_mtimes = {}
 		self.ignore_next_update = set()
+		self._save_io_lock, self._save_seq, self._written_seq = threading.Lock(), 0, {}
+		self._save_scheduler = DebounceScheduler(2.0, "ProjectSaveDebounce")
 		self.load()
 
 	def is_loaded(self): return self.projects is not None
@@ -76,36 +144,43 @@ class ProjectModel:
 		model = self
 		class _Handler(FileSystemEventHandler):
 			def __init__(self):
-				self._debounce_timer = None
-				self._debounce_lock = threading.Lock()
+				self._scheduler, self._content_scheduler = DebounceScheduler(1.0, "ProjectWatchDebounce"), DebounceScheduler(0.15, "ProjectContentBatch")
+				self._pending, self._pending_lock = set(), threading.Lock()
+				self._bl_source = (None, None, None)
 
-			def _debounce_refresh(self):
-				with self._debounce_lock:
-					if self._debounce_timer: self._debounce_timer.cancel()
-					self._debounce_timer = threading.Timer(1.0, self._do_refresh)
-					self._debounce_timer.daemon = True # avoid exit hang
-					self._debounce_timer.start()
+			def _debounce_refresh(self): self._scheduler.schedule('refresh', self._do_refresh)
 
 			def _do_refresh(self):
 				if model._file_watcher_queue: model._file_watcher_queue.put(('silent_refresh', None))
 
+			def _queue_content_update(self, rel_path):
+				with self._pending_lock: first = not self._pending; self._pending.add(rel_path)
+				if first: self._content_scheduler.schedule('contents', self._flush_pending)
+
+			def _flush_pending(self):
+				with self._pending_lock: pending, self._pending = self._pending, set()
+				tracked = model.file_contents; paths = [p for p in pending if p in tracked]
+				if paths and model._file_watcher_queue and model.update_file_contents(paths):
+					model._file_watcher_queue.put(('file_contents_loaded', model.current_project_name))
+
 			def on_any_event(self, event):
+				model._fs_event_epoch += 1
 				if model.current_project_name is None: return
 
-				current_bl = model.get_project_data(model.current_project_name, "blacklist", [])
-				global_bl = model.settings_model.get("global_blacklist", [])
-				blacklist_patterns = current_bl + global_bl
+				current_bl, global_bl = model.get_project_data(model.current_project_name, "blacklist", ()), model.settings_model.get("global_blacklist", ())
+				if self._bl_source[0] is not current_bl or self._bl_source[1] is not global_bl: self._bl_source = (current_bl, global_bl, _substring_matcher(tuple(current_bl) + tuple(global_bl)))
+				blacklisted = self._bl_source[2]
 
 				try:
 					rel_path = normalize_path(os.path.relpath(event.src_path, proj_path))
-					if any(p in rel_path for p in blacklist_patterns): return
+					if blacklisted and blacklisted(rel_path): return
 				except ValueError: return
 
+				model.mtime_epoch += 1
 				if event.is_directory or event.event_type in ('created', 'deleted', 'moved'):
 					self._debounce_refresh()
 				elif event.event_type == 'modified' and model._file_watcher_queue:
-					if model.update_file_contents([rel_path]):
-						model._file_watcher_queue.put(('file_contents_loaded', model.current_project_name))
+					self._queue_content_update(rel_path)
 		
 		self._observer = Observer()
 		self._observer.schedule(_Handler(), proj_path, recursive=True)
@@ -129,6 +204,7 @@ class ProjectModel:
 					current_files = {p for p in os.listdir(proj_path)}
 					if current_files != last_scan_files:
 						logger.info("Polling detected change in project directory.")
+						self.mtime_epoch += 1
 						if self._file_watcher_queue: self._file_watcher_queue.put(('silent_refresh', None))
 						last_scan_files = current_files
 				except OSError as e:
@@ -141,6 +217,7 @@ class ProjectModel:
 	def stop_threads(self):
 		logger.info("Stopping model background threads.")
 		self._stop_event.set()
+		self._save_scheduler.cancel_all()
 		if self._observer and Observer:
 			try:
 				self._observer.stop()
@@ -164,50 +241,80 @@ class ProjectModel:
 
 	# Data Persistence
 	# ------------------------------
+	def _read_project_file(self, project_file):
+		if not os.path.isfile(project_file): return project_file, None, 0
+		data = load_json_safely(project_file, project_file + ".lock", is_fatal=False)
+		try: mtime = os.path.getmtime(project_file)
+		except OSError: mtime = 0
+		return project_file, data, mtime
+
 	def load(self):
+		project_files = []
+		try:
+			with os.scandir(self.projects_dir) as it: project_files = [os.path.join(entry.path, 'project.json') for entry in it if entry.is_dir()]
+		except OSError: pass
+		try: loaded = list(self._thread_pool.map(self._read_project_file, project_files))
+		except RuntimeError: loaded = [self._read_project_file(pf) for pf in project_files]
 		with self.projects_lock:
-			self.projects.clear()
+			self.projects_version += 1
+			projects = {}
 			self.project_name_to_path.clear()
 			self.project_file_mtimes.clear()
-			if not os.path.isdir(self.projects_dir): return
-			for folder_name in os.listdir(self.projects_dir):
-				project_folder = os.path.join(self.projects_dir, folder_name)
-				project_file = os.path.join(project_folder, 'project.json')
-				if os.path.isfile(project_file):
-					data = load_json_safely(project_file, project_file + ".lock", is_fatal=False)
+			if not os.path.isdir(self.projects_dir): self.projects = projects; return
+			for project_file, data, mtime in loaded:
+				if data is not None:
 					if data and 'name' in data and 'path' in data:
 						needs_save = False
 						if 'id' not in data:
 							data['id'] = str(uuid.uuid4())
 							needs_save = True
 						project_name = data['name']
-						self.projects[project_name] = data
+						projects[project_name] = data
 						self.project_name_to_path[project_name] = project_file
 						if needs_save:
 							logger.info(f"Migrating project '{project_name}' to include a stable ID.")
 							atomic_write_with_backup(data, project_file, project_file + ".lock", file_key=project_file)
-						try:
-							self.project_file_mtimes[project_file] = os.path.getmtime(project_file)
-						except OSError:
-							self.project_file_mtimes[project_file] = 0
+							try: mtime = os.path.getmtime(project_file)
+							except OSError: mtime = 0
+						self.project_file_mtimes[project_file] = mtime
 					else:
 						logger.warning(f"Skipping invalid or corrupt project file: {project_file}")
-			self.baseline_projects = copy.deepcopy(self.projects)
+			self.projects = projects
+			self._baseline_digests = {name: self._project_digest(data) for name, data in self.projects.items()}
+
+	@staticmethod
+	def _serialize_project(data): return json.dumps(data, indent=4, ensure_ascii=False)
+
+	@staticmethod
+	def _project_digest(data=None, serialized=None): return hashlib.blake2b((ProjectModel._serialize_project(data) if serialized is None else serialized).encode('utf-8'), digest_size=16).digest()
+
+	def save(self, project_name=None): return self.save_snapshot(self.snapshot_if_dirty(project_name))
+
+	def save_soon(self, project_name):
+		if project_name: self._save_scheduler.schedule(project_name, lambda: self.save(project_name=project_name))
 
-	def save(self, project_name=None):
+	def snapshot_if_dirty(self, project_name=None):
 		with self.projects_lock:
-			projects_to_save = [project_name] if project_name and project_name in self.projects else self.projects.keys()
-			for name in projects_to_save:
-				if self.projects.get(name) == self.baseline_projects.get(name):
-					continue
-				project_data = self.projects.get(name)
-				project_path = self.project_name_to_path.get(name)
-				if not project_data or not project_path: continue
+			names = [project_name] if project_name and project_name in self.projects else list(self.projects.keys())
+			dirty = {}
+			for n in names:
+				serialized = self._serialize_project(self.projects[n]); digest = self._project_digest(serialized=serialized)
+				if digest != self._baseline_digests.get(n): dirty[n] = (serialized if self.projects[n] else None, self.project_name_to_path.get(n), digest)
+			if not dirty: return None
+			self._save_seq += 1
+			return self._save_seq, dirty
+
+	def save_snapshot(self, snapshot):
+		if not snapshot: return True
+		seq, dirty = snapshot
+		with self._save_io_lock:
+			for name, (serialized, project_path, digest) in dirty.items():
+				if not serialized or not project_path or self._written_seq.get(name, 0) > seq: continue
 				canon_path = os.path.normcase(os.path.abspath(project_path))
 				self.ignore_next_update.add(canon_path)
-				lock_path = project_path + ".lock"
-				if atomic_write_with_backup(project_data, project_path, lock_path, file_key=canon_path):
-					self.baseline_projects[name] = copy.deepcopy(project_data)
+				if atomic_write_with_backup(None, project_path, project_path + ".lock", file_key=canon_path, serialized=serialized):
+					self._written_seq[name] = seq
+					with self.projects_lock: self._baseline_digests[name] = digest
 		return True
 
 	def check_project_for_external_changes(self, file_path):
@@ -231,12 +338,11 @@ class ProjectModel:
 		return False
 
 	def have_projects_changed(self):
-		with self.projects_lock: return self.projects != self.baseline_projects
+		with self.projects_lock: return self.projects.keys() != self._baseline_digests.keys() or any(self._project_digest(data) != self._baseline_digests[name] for name, data in self.projects.items())
 
 	# Project Management
 	# ------------------------------
-	def exists(self, name):
-		with self.projects_lock: return name in self.projects
+	def exists(self, name): return name in self.projects
 	
 	def add_project(self, name, path):
 		with self.projects_lock:
@@ -250,7 +356,8 @@ class ProjectModel:
 				"blacklist": [], "keep": [], "prefix": "", "selection_counts": {},
 				"last_usage": time.time(), "usage_count": 1, "ui_state": {}
 			}
-			self.projects[name] = new_project_data
+			self.projects = {**self.projects, name: new_project_data}
+			self.projects_version += 1
 			self.project_name_to_path[name] = project_file_path
 		self.save(project_name=name)
 
@@ -259,22 +366,21 @@ class ProjectModel:
 			if name in self.projects:
 				project_data = self.projects.get(name, {})
 				project_id_to_remove = project_data.get('id')
-				if project_id_to_remove: self.selection_by_id.pop(project_id_to_remove, None)
+				if project_id_to_remove: self.selection_by_id.pop(project_id_to_remove, None); self.selection_version += 1
 				project_path = self.project_name_to_path.pop(name, None)
-				del self.projects[name]
+				self.projects = {k: v for k, v in self.projects.items() if k != name}
+				self.projects_version += 1
 				
 				if project_path:
 					project_folder = os.path.dirname(project_path)
 					try: shutil.rmtree(project_folder)
 					except OSError as e: logger.error(f"Failed to delete project folder {project_folder}: {e}")
 
-	def get_project_path(self, name):
-		with self.projects_lock: return self.projects.get(name, {}).get("path")
+	def get_project_path(self, name): return self.projects.get(name, {}).get("path")
 	
 	def get_project_data(self, name, key=None, default=None):
-		with self.projects_lock:
-			if key: return self.projects.get(name, {}).get(key, default)
-			return copy.deepcopy(self.projects.get(name, {}))
+		if key: return self.projects.get(name, {}).get(key, default)
+		return copy.deepcopy(self.projects.get(name, {}))
 	def is_project_path_valid(self): return self.current_project_name and os.path.isdir(self.get_project_path(self.current_project_name))
 	def set_current_project(self, name):
 		with self.projects_lock, self._items_lock, self._file_content_lock:
@@ -284,9 +390,9 @@ class ProjectModel:
 				self.stop_threads_and_pools()
 				self._stop_event.clear()
 				self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.MAX_IO_WORKERS)
-				self.file_contents.clear(); self.file_mtimes.clear(); self.file_char_counts.clear()
-				self.directory_tree_cache = None
-				self.all_items.clear(); self.filtered_items.clear()
+				self.file_contents.clear(); self.file_mtimes.clear(); self.file_char_counts.clear(); self.mtime_epoch += 1; self._stat_verified = (None, frozenset())
+				self.directory_tree_cache = None; self._dirtree_memo = {}; self._scan_generation += 1
+				self.all_items, self.filtered_items = (), (); self.items_version += 1
 
 			self.current_project_name = name
 			new_project_id = self.get_project_data(name, 'id') if name else None
@@ -296,26 +402,27 @@ class ProjectModel:
 				self.project_tree_scroll_pos = self.projects[name].get("scroll_pos", 0.0)
 				if new_project_id not in self.selection_by_id:
 					self.selection_by_id[new_project_id] = set(self.projects.get(name, {}).get('last_files', []))
+					self.selection_version += 1
 			else:
 				self.project_tree_scroll_pos = 0.0
-	def set_project_scroll_pos(self, name, pos):
+	def _patch_project(self, name, changes):
 		with self.projects_lock:
-			if name in self.projects and self.projects[name].get('scroll_pos') != pos: self.projects[name]['scroll_pos'] = pos
-	def get_project_ui_state(self, name):
-		with self.projects_lock: return self.projects.get(name, {}).get("ui_state", {})
+			if not name or name not in self.projects: return None
+			proj = {**self.projects[name], **changes}; self.projects = {**self.projects, name: proj}
+			return proj
+	def set_project_scroll_pos(self, name, pos):
+		if name in self.projects and self.projects[name].get('scroll_pos') != pos: self._patch_project(name, {'scroll_pos': pos})
+	def get_project_ui_state(self, name): return dict(self.projects.get(name, {}).get("ui_state", {}))
 	def set_project_ui_state(self, name, state):
-		with self.projects_lock:
-			if name in self.projects and self.projects[name].get('ui_state') != state: self.projects[name]['ui_state'] = state
+		if name in self.projects and self.projects[name].get('ui_state') != state: self._patch_project(name, {'ui_state': state})
 	def update_project_usage(self):
 		with self.projects_lock:
-			if self.current_project_name and self.current_project_name in self.projects:
-				proj = self.projects[self.current_project_name]
-				proj["last_usage"] = time.time()
-				proj["usage_count"] = proj.get("usage_count", 0) + 1
-		self.save(project_name=self.current_project_name)
+			proj = self.projects.get(self.current_project_name)
+			if proj is not None and self._patch_project(self.current_project_name, {"last_usage": time.time(), "usage_count": proj.get("usage_count", 0) + 1}): self.projects_version += 1
+		self.save_soon(self.current_project_name)
 	def update_project(self, name, data):
 		with self.projects_lock:
-			if name in self.projects: self.projects[name].update(data)
+			if self._patch_project(name, data) is not None: self.projects_version += 1
 
 	def rename_project(self, old_name, new_name):
 		with self.projects_lock:
@@ -343,14 +450,14 @@ class ProjectModel:
 						logger.critical(f"Failed to move project file during rename recovery. Project state might be inconsistent: {e2}")
 						return False
 			
-			project_data = self.projects.pop(old_name)
-			project_data['name'] = new_name
-			self.projects[new_name] = project_data
+			projects = dict(self.projects); project_data = {**projects.pop(old_name), 'name': new_name}
+			projects[new_name] = project_data; self.projects = projects
+			self.projects_version += 1
 
 			self.project_name_to_path.pop(old_name)
 			self.project_name_to_path[new_name] = new_project_file_path
 
-			if old_name in self.baseline_projects: self.baseline_projects.pop(old_name)
+			self._baseline_digests.pop(old_name, None)
 
 			if old_project_file_path in self.project_file_mtimes:
 				mtime = self.project_file_mtimes.pop(old_project_file_path)
@@ -360,104 +467,111 @@ class ProjectModel:
 			self.settings_model.set('last_selected_project', new_name)
 		return True
 	
-	def get_project_id_by_name(self, name):
-		with self.projects_lock:
-			return self.projects.get(name, {}).get("id")
+	def get_project_id_by_name(self, name): return self.projects.get(name, {}).get("id")
 
 	def get_sorted_projects_for_display(self):
-		with self.projects_lock:
-			return sorted([(k, p.get("last_usage", 0), p.get("usage_count", 0)) for k, p in self.projects.items()], key=lambda x: (-x[1], -x[2], x[0].lower()))
+		version = self.projects_version; projects = self.projects
+		cached_projects, cached_version, rows = self._sorted_projects_cache
+		if cached_projects is projects and cached_version == version: return list(rows)
+		rows = tuple(sorted([(k, p.get("last_usage", 0), p.get("usage_count", 0)) for k, p in projects.items()], key=lambda x: (-x[1], -x[2], x[0].lower())))
+		self._sorted_projects_cache = (projects, version, rows)
+		return list(rows)
 
 	def load_items_async(self, is_new_project, queue):
 		self.directory_tree_cache = None
 		project_id = self.current_project_id
-		self._loading_thread = threading.Thread(target=self._load_items_worker, args=(project_id, is_new_project, queue), daemon=True)
+		self._scan_generation += 1
+		self._loading_thread = threading.Thread(target=self._load_items_worker, args=(project_id, is_new_project, queue, self._scan_generation), daemon=True)
 		self._loading_thread.start()
 
-	def _load_items_worker(self, project_id, is_new_project, queue):
-		if self.current_project_id != project_id: return
+	def _load_items_worker(self, project_id, is_new_project, queue, generation=None):
+		def superseded(): return self.current_project_id != project_id or (generation is not None and generation != self._scan_generation)
+		cancelled = ('load_items_done', ("cancelled", None, is_new_project, project_id))
+		if superseded(): return queue.put(cancelled)
 		if not self.current_project_name: return
-		with self.projects_lock: proj = self.projects[self.current_project_name]; proj_path = proj["path"]
+		proj = self.projects[self.current_project_name]; proj_path = proj["path"]
 		if not os.path.isdir(proj_path): return queue.put(('load_items_done', ("error", None, is_new_project, project_id)))
 		
 		respect_git = self.settings_model.get('respect_gitignore', True)
-		git_patterns = parse_gitignore(os.path.join(proj_path, '.gitignore')) if respect_git and os.path.isfile(os.path.join(proj_path, '.gitignore')) else []
-		with self.projects_lock: proj_bl = proj.get("blacklist", []); proj_kp = proj.get("keep", [])
+		proj_bl, proj_kp = proj.get("blacklist", []), proj.get("keep", [])
 		glob_bl = self.settings_model.get("global_blacklist", []); glob_kp = self.settings_model.get("global_keep", [])
-		comb_bl_lower = [b.strip().lower().replace("\\", "/") for b in list(set(proj_bl + glob_bl))]
-		comb_kp_lower = [p.strip().lower().replace("\\", "/") for p in list(set(proj_kp + glob_kp))]
+		is_ignored = _project_ignore_matcher(proj_path, respect_git, proj_kp + glob_kp, proj_bl + glob_bl)
 
 		found_items, file_count, limit_exceeded = [], 0, False
+		add_item, by_name = found_items.append, operator.attrgetter('name')
 		
-		q = [(proj_path, "")] # Use a queue for iterative scanning
-		processed_dirs = set()
+		q = collections.deque([(proj_path, "")]) # Use a queue for iterative scanning
 		while q:
-			if self.current_project_id != project_id: return
+			if superseded(): return queue.put(cancelled)
 			if file_count >= self.max_files: limit_exceeded = True; break
-			current_path, rel_prefix = q.pop(0)
-			if current_path in processed_dirs: continue
-			processed_dirs.add(current_path)
+			current_path, rel_prefix = q.popleft()
 
-			try: entries = sorted(os.scandir(current_path), key=lambda e: e.name)
+			try:
+				with os.scandir(current_path) as it: entries = sorted(it, key=by_name)
 			except OSError: continue
 
 			for entry in entries:
 				if file_count >= self.max_files: limit_exceeded = True; break
-				try:
-					entry_rel_path = normalize_path(os.path.relpath(entry.path, proj_path))
-				except ValueError: continue
-				
-				is_dir = entry.is_dir(follow_symlinks=False)
+				name = entry.name
+				if '\\' in name: name = normalize_path(name)
+				entry_rel_path = sys.intern(f"{rel_prefix}/{name}" if rel_prefix else name)
+				try: is_dir = entry.is_dir(follow_symlinks=False)
+				except OSError: continue
 				path_to_check = f"{entry_rel_path}/" if is_dir else entry_rel_path
 
-				if path_should_be_ignored(path_to_check, respect_git, git_patterns, comb_kp_lower, comb_bl_lower):
+				if is_ignored(path_to_check):
 					continue
 				
 				if is_dir:
-					found_items.append({"type": "dir", "path": path_to_check, "level": path_to_check.count('/') -1})
+					add_item({"type": "dir", "path": path_to_check, "level": path_to_check.count('/') -1})
 					q.append((entry.path, entry_rel_path))
 				else: # is_file
-					found_items.append({"type": "file", "path": entry_rel_path, "level": entry_rel_path.count('/')})
+					try: st = entry.stat(); add_item({"type": "file", "path": entry_rel_path, "level": entry_rel_path.count('/'), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+					except OSError: add_item({"type": "file", "path": entry_rel_path, "level": entry_rel_path.count('/')})
 					file_count += 1
 		
+		if superseded(): return queue.put(cancelled)
 		queue.put(('load_items_done', ("ok", (found_items, limit_exceeded), is_new_project, project_id)))
 
 	def _initialize_file_data(self, items):
 		if not self.current_project_name: return
 		with self._file_content_lock:
-			self.file_char_counts.clear(); self.file_contents.clear(); self.file_mtimes.clear()
+			self.file_char_counts.clear(); self.file_contents.clear(); self.file_mtimes.clear(); self.mtime_epoch += 1; self._stat_verified = (None, frozenset())
 			files_to_load = [item["path"] for item in items if item["type"] == "file"]
-			for rp in files_to_load:
-				self.file_char_counts[rp] = 0
-				self.file_contents[rp] = None # Placeholder
+			self.file_char_counts.update(dict.fromkeys(files_to_load, 0)); self.file_contents.update(dict.fromkeys(files_to_load)) # Placeholders
 
 	def _load_all_file_contents_and_sizes_worker(self, queue):
 		proj_path = self.get_project_path(self.current_project_name)
 		if not proj_path: return
-		with self._items_lock: all_files = [item["path"] for item in self.all_items if item["type"] == "file"]
+		with self._items_lock: file_items = [item for item in self.all_items if item["type"] == "file"]
+		all_files = [item["path"] for item in file_items]
 		if not all_files:
 			if queue: queue.put(('file_contents_loaded', self.current_project_name))
 			return
 
+		stats = {item["path"]: (item["size"], item["mtime_ns"]) for item in file_items if "mtime_ns" in item}
+
 		def load_content_and_metadata(relative_path):
 			full_path = os.path.join(proj_path, relative_path)
 			try:
-				st = os.stat(full_path)
-				if st.st_size > self.max_file_size:
+				if relative_path in stats: size, mtime_ns = stats[relative_path]
+				else: st = os.stat(full_path); size, mtime_ns = st.st_size, st.st_mtime_ns
+				if size > self.max_file_size:
 					content = self.FILE_TOO_LARGE_SENTINEL
-					char_count = st.st_size
+					char_count = size
 				else:
-					content = safe_read_file(full_path)
+					content = read_text_unified(full_path)
 					if content is not None:
-						content = unify_line_endings(content)
 						char_count = len(content)
 					else:
 						char_count = 0
-				return (relative_path, content, char_count, st.st_mtime_ns)
+				return (relative_path, content, char_count, mtime_ns)
 			except (FileNotFoundError, OSError): return (relative_path, None, 0, 0)
 		
 		try:
-			results = list(self._thread_pool.map(load_content_and_metadata, all_files))
+			unscanned = [rp for rp in all_files if rp not in stats]
+			if unscanned: stats.update((rp, (st.st_size, st.st_mtime_ns)) for rp, st in self._batch_stat(proj_path, unscanned).items())
+			results = self._pool_map(load_content_and_metadata, all_files)
 		except RuntimeError:
 			logger.warning("Thread pool is shut down; cannot load file contents.")
 			return
@@ -466,15 +580,37 @@ class ProjectModel:
 				self.file_contents[rp] = content
 				self.file_char_counts[rp] = char_count
 				self.file_mtimes[rp] = mtime
+			self.mtime_epoch += 1
 		if queue: queue.put(('file_contents_loaded', self.current_project_name))
 
+	def _pool_map(self, fn, items, max_chunk=64):
+		items = list(items); chunk = max(1, min(max_chunk, len(items) // (self.MAX_IO_WORKERS * 4)))
+		if chunk == 1: return list(self._thread_pool.map(fn, items))
+		def run_chunk(part): return [fn(item) for item in part]
+		return [result for part in self._thread_pool.map(run_chunk, [items[i:i + chunk] for i in range(0, len(items), chunk)]) for result in part]
+
+	def _batch_stat(self, proj_path, rel_paths):
+		by_dir = collections.defaultdict(set)
+		for rp in rel_paths: rel_dir, _, name = rp.rpartition('/'); by_dir[rel_dir].add(name)
+		def scan(item): return item[0], _scan_dir_stats(os.path.join(proj_path, item[0]) if item[0] else proj_path, item[1])
+		stats = {}
+		for rel_dir, found in self._thread_pool.map(scan, by_dir.items()):
+			prefix = f"{rel_dir}/" if rel_dir else ""
+			stats.update((prefix + name, st) for name, st in found.items())
+		return stats
+
 	def set_items(self, items):
-		with self._items_lock: self.all_items = items; self.filtered_items = items; self.directory_tree_cache = None
+		with self._items_lock: self.all_items = self.filtered_items = tuple(items); self.items_version += 1; self.directory_tree_cache = None; self._dirtree_memo = {}
 	def set_filtered_items(self, items):
-		with self._items_lock: self.filtered_items = items
+		with self._items_lock: self.filtered_items = tuple(items)
 	def get_filtered_items(self):
 		with self._items_lock: return self.filtered_items
 
+	def is_watching(self): return bool(self._observer and self._observer.is_alive())
+
+	def get_cached_mtimes(self, paths):
+		with self._file_content_lock: return {p: self.file_mtimes.get(p) for p in paths}
+
 	def get_files_in_folder(self, folder_path):
 		with self._items_lock:
 			return [item['path'] for item in self.all_items if item['type'] == 'file' and item['path'].startswith(folder_path)]
@@ -486,38 +622,43 @@ class ProjectModel:
 
 		dirty = []
 		files_to_check_mtime = []
+		event_epoch = self._fs_event_epoch if self.is_watching() else None
+		verified_epoch, verified_files = self._stat_verified
+		skip_verified = event_epoch is not None and event_epoch == verified_epoch
 		with self._file_content_lock:
 			mtimes_copy = self.file_mtimes.copy()
 			for rp in selected_files:
 				if self.file_contents.get(rp) is None:
 					dirty.append(rp)
-				else:
+				elif not (skip_verified and rp in verified_files):
 					files_to_check_mtime.append(rp)
 
+		try: stats = self._batch_stat(proj_path, files_to_check_mtime) if files_to_check_mtime else {}
+		except RuntimeError: stats = {}
 		for rp in files_to_check_mtime:
-			full_path = os.path.join(proj_path, rp)
-			if not os.path.isfile(full_path):
+			st = stats.get(rp)
+			if st is None:
+				try: st = os.stat(os.path.join(proj_path, rp))
+				except OSError:
+					if rp in mtimes_copy: dirty.append(rp)
+					continue
+			if not stat.S_ISREG(st.st_mode):
 				if rp in mtimes_copy: dirty.append(rp)
 				continue
-			try:
-				current_mtime = os.stat(full_path).st_mtime_ns
-				if mtimes_copy.get(rp) != current_mtime:
-					dirty.append(rp)
-			except OSError:
-				if rp in mtimes_copy: dirty.append(rp)
+			if mtimes_copy.get(rp) != st.st_mtime_ns: dirty.append(rp)
 
 		dirty = list(dict.fromkeys(dirty)) # Deduplicate
-		if not dirty: return False
-		self.directory_tree_cache = None
+		if not dirty:
+			if event_epoch is not None: self._stat_verified = (event_epoch, (verified_files | frozenset(files_to_check_mtime)) if skip_verified else frozenset(files_to_check_mtime))
+			return False
 
 		def load_single(relative_path):
 			full_path = os.path.join(proj_path, relative_path)
 			try:
-				st = os.stat(full_path)
-				content = safe_read_file(full_path) if st.st_size <= self.max_file_size else self.FILE_TOO_LARGE_SENTINEL
+				st = stats.get(relative_path) or os.stat(full_path)
+				content = read_text_unified(full_path) if st.st_size <= self.max_file_size else self.FILE_TOO_LARGE_SENTINEL
 				if content is None:
 					return (relative_path, None, None, 0)
-				if content not in [None, self.FILE_TOO_LARGE_SENTINEL]: content = unify_line_endings(content)
 				char_count = len(content) if content is not None and content != self.FILE_TOO_LARGE_SENTINEL else st.st_size
 				return (relative_path, content, st.st_mtime_ns, char_count)
 			except FileNotFoundError: return (relative_path, None, None, 0)
@@ -525,18 +666,22 @@ class ProjectModel:
 
 		if self._stop_event.is_set(): return False
 		try:
-			results = list(self._thread_pool.map(load_single, dirty))
+			results = self._pool_map(load_single, dirty)
 		except RuntimeError:
 			logger.warning("Thread pool is shut down; cannot update file contents.")
 			return False
 
 		with self._file_content_lock:
+			changed = False
 			for rp, content, mtime, char_count in results:
 				if mtime is None:
-					self.file_contents.pop(rp, None); self.file_char_counts.pop(rp, None); self.file_mtimes.pop(rp, None)
+					self.file_contents.pop(rp, None); self.file_char_counts.pop(rp, None); self.file_mtimes.pop(rp, None); changed = True
+				elif content is not None and self.file_contents.get(rp) == content and self.file_char_counts.get(rp) == char_count:
+					self.file_mtimes[rp] = mtime
 				else:
-					self.file_contents[rp] = content; self.file_char_counts[rp] = char_count; self.file_mtimes[rp] = mtime
-		return True
+					self.file_contents[rp] = content; self.file_char_counts[rp] = char_count; self.file_mtimes[rp] = mtime; changed = True
+			self.mtime_epoch += 1
+		return changed
 
 	def search_file_contents(self, query, file_paths, cancel_event=None):
 		if self._stop_event.is_set(): return set()
@@ -580,7 +725,7 @@ class ProjectModel:
 		if self._stop_event.is_set(): return set()
 		try:
 			# Use thread pool for parallel reading and searching
-			search_results = list(self._thread_pool.map(search_single, file_paths))
+			search_results = self._pool_map(search_single, file_paths)
 			results = {rp for rp in search_results if rp is not None}
 		except RuntimeError:
 			logger.warning("Thread pool is shut down; cannot search file contents.")
@@ -591,22 +736,22 @@ class ProjectModel:
 	def set_selection(self, selection_set):
 		with self.projects_lock:
 			if self.current_project_id:
-				current_selection = set(selection_set)
+				current_selection = {sys.intern(p) if type(p) is str else p for p in selection_set}
 				self.selection_by_id[self.current_project_id] = current_selection
-				if self.current_project_name and self.current_project_name in self.projects:
-					self.projects[self.current_project_name]['last_files'] = sorted(list(current_selection))
+				self.selection_version += 1
+				ordered = sorted(current_selection)
+				self._sorted_selection_cache = ((self.current_project_id, self.selection_version), tuple(ordered))
+				self._patch_project(self.current_project_name, {'last_files': ordered})
 
-	def update_selection_from_set(self, new_set):
-		with self.projects_lock:
-			if self.current_project_id:
-				current_selection = set(new_set)
-				self.selection_by_id[self.current_project_id] = current_selection
-				if self.current_project_name and self.current_project_name in self.projects:
-					self.projects[self.current_project_name]['last_files'] = sorted(list(current_selection))
+	def update_selection_from_set(self, new_set): self.set_selection(new_set)
 
 	def get_selected_files(self):
 		with self.projects_lock:
-			return sorted(list(self.get_selected_files_set()))
+			token = (self.current_project_id, self.selection_version)
+			cached = self._sorted_selection_cache
+			if not cached or cached[0] != token:
+				cached = (token, tuple(sorted(self.get_selected_files_set()))); self._sorted_selection_cache = cached
+			return list(cached[1])
 
 	def get_selected_files_set(self):
 		with self.projects_lock:
@@ -616,72 +761,86 @@ class ProjectModel:
 
 	def set_last_used_files(self, project_name, selection):
 		with self.projects_lock:
-			if project_name and project_name in self.projects:
-				self.projects[project_name]['last_files'] = selection
-				project_id = self.projects[project_name].get('id')
+			proj = self._patch_project(project_name, {'last_files': selection})
+			if proj is not None:
+				project_id = proj.get('id')
 				if project_id:
 					self.selection_by_id[project_id] = set(selection)
+					self.selection_version += 1
 	def set_last_used_template(self, template_name):
-		with self.projects_lock:
-			if self.current_project_name and self.current_project_name in self.projects: self.projects[self.current_project_name]['last_template'] = template_name
+		self._patch_project(self.current_project_name, {'last_template': template_name})
 	def increment_selection_counts(self, file_paths):
 		with self.projects_lock:
-			if self.current_project_name and self.current_project_name in self.projects:
-				proj = self.projects[self.current_project_name]
-				counts = proj.setdefault("selection_counts", {})
+			proj = self.projects.get(self.current_project_name)
+			if proj is not None:
+				counts = dict(proj.get("selection_counts", {}))
 				for path in file_paths:
 					counts[path] = counts.get(path, 0) + 1
+				self._patch_project(self.current_project_name, {"selection_counts": counts})
 
-	def run_autoblacklist_async(self, proj_name, queue):
-		self._autoblacklist_thread = threading.Thread(target=self._auto_blacklist_worker, args=(proj_name, queue), daemon=True)
+	def run_autoblacklist_async(self, proj_name, queue, items=None):
+		self._autoblacklist_thread = threading.Thread(target=self._auto_blacklist_worker, args=(proj_name, queue, items), daemon=True)
 		self._autoblacklist_thread.start()
 
-	def _auto_blacklist_worker(self, proj_name, queue):
-		new_additions = self._check_and_auto_blacklist(proj_name)
+	def _auto_blacklist_worker(self, proj_name, queue, items=None):
+		new_additions = self._check_and_auto_blacklist(proj_name, items=items)
 		if new_additions: queue.put(('auto_bl', (proj_name, new_additions)))
 
-	def _check_and_auto_blacklist(self, proj_name, threshold=50):
+	def _check_and_auto_blacklist(self, proj_name, threshold=50, items=None):
 		proj_path = self.get_project_path(proj_name)
 		if not os.path.isdir(proj_path): return []
-		with self.projects_lock: proj = self.projects[proj_name]
+		proj = self.projects[proj_name]
 		current_bl = proj.get("blacklist", []) + self.settings_model.get("global_blacklist", [])
 		keep_patterns = proj.get("keep", []) + self.settings_model.get("global_keep", [])
-		keep_patterns_lower = [p.lower() for p in keep_patterns]
-		git_patterns = parse_gitignore(os.path.join(proj_path, '.gitignore')) if self.settings_model.get('respect_gitignore', True) else []
+		bl_lower = [b.lower() for b in current_bl]; bl_lower_set = set(bl_lower)
+		in_blacklist = _substring_matcher(tuple(bl_lower)) or (lambda s: False)
+		if items is not None:
+			counts = collections.Counter(i["path"].rpartition('/')[0] for i in items if i["type"] == "file")
+			return [d for d, c in counts.items() if c > threshold and d and (dl := d.lower()) not in bl_lower_set and not in_blacklist(dl)]
+		is_ignored = _project_ignore_matcher(proj_path, self.settings_model.get('respect_gitignore', True), keep_patterns, current_bl)
 		new_blacklisted = []
 		for root, dirs, files in os.walk(proj_path):
 			rel_root = normalize_path(os.path.relpath(root, proj_path)).strip("/")
-			if any(bl.lower() in rel_root.lower() for bl in current_bl if rel_root): continue
-			unignored_files = [f for f in files if not path_should_be_ignored(f"{rel_root}/{f}".strip("/"), self.settings_model.get('respect_gitignore',True), git_patterns, keep_patterns_lower, current_bl)]
-			if len(unignored_files) > threshold and rel_root and rel_root.lower() not in [b.lower() for b in current_bl]: new_blacklisted.append(rel_root)
+			rel_root_lower = rel_root.lower()
+			if rel_root and in_blacklist(rel_root_lower): dirs[:] = []; continue
+			if len(files) <= threshold: continue
+			unignored_count = sum(1 for f in files if not is_ignored(f"{rel_root}/{f}".strip("/")))
+			if unignored_count > threshold and rel_root and rel_root_lower not in bl_lower_set: new_blacklisted.append(rel_root)
 		return new_blacklisted
 
 	def add_to_blacklist(self, proj_name, dirs):
 		with self.projects_lock:
-			if proj_name in self.projects:
-				proj = self.projects[proj_name]
-				proj["blacklist"] = list(dict.fromkeys(proj.get("blacklist", []) + dirs))
-		self.save(project_name=proj_name)
+			proj = self.projects.get(proj_name)
+			if proj is not None: self._patch_project(proj_name, {"blacklist": list(dict.fromkeys(proj.get("blacklist", []) + dirs))})
+		self.save_soon(proj_name)
+
+	@staticmethod
+	def _write_content_block(buf, separator, content):
+		head, *rest = separator.split('{contents}'); buf.write(head)
+		for part in rest: buf.write(content); buf.write(part)
 
 	@staticmethod
 	def _replace_placeholder_line(text, placeholder, replacement):
-		pat = re.compile(r'^[ \t]*' + re.escape(placeholder) + r'[ \t]*(?:\r?\n|$)', re.MULTILINE)
-		def sub(m): s = m.group(0); return (replacement.rstrip('\n') + ('\n' if replacement and s.endswith('\n') else '')) if replacement else ''
-		new, n = pat.subn(sub, text, count=1)
-		return new if n > 0 else (text.replace(placeholder, replacement, 1) if placeholder in text else text)
+		first = pos = text.find(placeholder)
+		while pos != -1:
+			line_start, end = text.rfind('\n', 0, pos) + 1, pos + len(placeholder)
+			line_end = text.find('\n', end); has_nl = line_end != -1
+			tail = text[end:line_end if has_nl else len(text)]
+			if not text[line_start:pos].strip(' \t') and not (tail[:-1] if has_nl and tail.endswith('\r') else tail).strip(' \t'):
+				line_repl = (replacement.rstrip('\n') + ('\n' if has_nl else '')) if replacement else ''
+				return text[:line_start] + line_repl + text[line_end + 1 if has_nl else len(text):]
+			pos = text.find(placeholder, end)
+		return text if first == -1 else text[:first] + replacement + text[first + len(placeholder):]
 
 	def simulate_final_prompt(self, selection, template_name, clipboard_content="", dir_tree=None):
 		prompt, total_selection_chars, oversized, truncated, sanitized_count = self.simulate_generation(selection, template_name, clipboard_content, dir_tree)
 		return prompt.rstrip('\n') + '\n', total_selection_chars, oversized, truncated, sanitized_count
 
 	def simulate_generation(self, selection, template_name, clipboard_content, dir_tree=None):
-		with self.projects_lock:
-			if not self.current_project_name or self.current_project_name not in self.projects: return "", 0, [], [], 0
-			proj = self.projects[self.current_project_name]
-			prefix = proj.get("prefix", "").strip()
-		s1 = f"### {prefix} File Structure" if prefix else "### File Structure"
-		s2 = f"### {prefix} Code Files provided" if prefix else "### Code Files provided"
-		s3 = f"### {prefix} Code Files" if prefix else "### Code Files"
+		proj = self.projects.get(self.current_project_name) if self.current_project_name else None
+		if proj is None: return "", 0, [], [], 0
+		prefix = proj.get("prefix", "").strip()
+		s1, s2, s3 = _section_headings(prefix)
 		
 		if dir_tree is None: dir_tree = self.generate_directory_tree_custom()
 		
@@ -694,38 +853,39 @@ class ProjectModel:
 		prompt = template_content
 		if "{{CLIPBOARD}}" in found_placeholders: prompt = self._replace_placeholder_line(prompt, "{{CLIPBOARD}}", clipboard_content)
 
-		content_blocks, oversized_files, truncated_files = [], [], []
+		content_buf, block_count, oversized_files, truncated_files = io.StringIO(), 0, [], []
+		write_blocks = "{{file_contents}}" in found_placeholders
 		total_content_size, total_selection_chars, sanitized_count = 0, 0, 0
 		
 		separator_template = self.settings_model.get('file_content_separator', '--- {path} ---\n{contents}\n--- {path} ---')
+		has_file_type = '{fileType}' in separator_template
 		
-		lang_map = {
-			'.py': 'python', '.js': 'javascript', '.ts': 'typescript', '.html': 'html', '.css': 'css', '.scss': 'scss', '.json': 'json', '.xml': 'xml', '.yaml': 'yaml', '.yml': 'yaml', '.md': 'markdown', '.java': 'java', '.cs': 'csharp', '.cpp': 'cpp', '.c': 'c', '.h': 'c', '.hpp': 'cpp', '.go': 'go', '.rs': 'rust', '.php': 'php', '.rb': 'ruby', '.sh': 'bash', '.ps1': 'powershell', '.sql': 'sql', '.dockerignore': 'dockerignore', 'Dockerfile': 'dockerfile'
-		}
-
+		get_content, get_count, too_large, max_content_size = self.file_contents.get, self.file_char_counts.get, self.FILE_TOO_LARGE_SENTINEL, self.max_content_size
 		with self._file_content_lock:
 			for i, rp in enumerate(selection):
-				content = self.file_contents.get(rp)
-				if content == self.FILE_TOO_LARGE_SENTINEL:
+				content = get_content(rp)
+				if content == too_large:
 					oversized_files.append(rp)
-					total_selection_chars += self.file_char_counts.get(rp, 0)
+					total_selection_chars += get_count(rp, 0)
 					continue
 				if content is None: continue
 
 				content, was_sanitized = sanitize_content(rp, content, self.settings_model)
 				if was_sanitized: sanitized_count += 1
 				
-				if total_content_size + len(content) > self.max_content_size and content:
+				if total_content_size + len(content) > max_content_size and content:
 					truncated_files.extend(selection[i:])
 					break
 				
-				filename = os.path.basename(rp); ext = os.path.splitext(rp)[1]
-				lang = lang_map.get(filename, lang_map.get(ext, 'text'))
-				current_separator = separator_template.replace('{path}', rp).replace('{fileType}', lang)
-				if '{fileType}' not in separator_template:
-					current_separator = current_separator.replace('python', lang)
-				block = current_separator.replace('{contents}', content)
-				content_blocks.append(block)
+				if write_blocks:
+					filename = os.path.basename(rp); ext = os.path.splitext(rp)[1]
+					lang = LANG_MAP.get(filename) or LANG_MAP.get(ext, 'text')
+					current_separator = separator_template.replace('{path}', rp).replace('{fileType}', lang)
+					if not has_file_type:
+						current_separator = current_separator.replace('python', lang)
+					content_buf.write(f"{s3}\n\n" if not block_count else "\n")
+					ProjectModel._write_content_block(content_buf, current_separator, content)
+				block_count += 1
 				
 				total_content_size += len(content)
 				total_selection_chars += len(content)
@@ -739,17 +899,14 @@ class ProjectModel:
 		files_list_replacement = ""
 		if "{{files_provided}}" in found_placeholders:
 			if selection:
-				lines = "".join(f"- {x}\n" for x in selection)
+				lines = "- " + "\n- ".join(selection) + "\n"
 				files_list_content = f"{s2}\n{lines}".rstrip()
 				files_list_replacement = files_list_content
 			prompt = self._replace_placeholder_line(prompt, "{{files_provided}}", files_list_replacement)
 
 		content_replacement = ""
 		if "{{file_contents}}" in found_placeholders:
-			if content_blocks:
-				content_block_text = '\n'.join(content_blocks)
-				content_replacement_content = f"{s3}\n\n{content_block_text}".rstrip()
-				content_replacement = content_replacement_content
+			if block_count: content_replacement = content_buf.getvalue().rstrip()
 			prompt = self._replace_placeholder_line(prompt, "{{file_contents}}", content_replacement)
 
 		return prompt, total_selection_chars, oversized_files, truncated_files, sanitized_count
@@ -757,9 +914,7 @@ class ProjectModel:
 	@staticmethod
 	def simulate_generation_static(selection, template_content, clipboard_content, dir_tree, project_prefix, model_config, file_separator_template):
 		prefix = project_prefix.strip()
-		s1 = f"### {prefix} File Structure" if prefix else "### File Structure"
-		s2 = f"### {prefix} Code Files provided" if prefix else "### Code Files provided"
-		s3 = f"### {prefix} Code Files" if prefix else "### Code Files"
+		s1, s2, s3 = _section_headings(prefix)
 
 		placeholders = ["{{dirs}}", "{{files_provided}}", "{{file_contents}}", "{{CLIPBOARD}}"]
 		placeholder_positions = {p: template_content.find(p) for p in placeholders}
@@ -768,12 +923,11 @@ class ProjectModel:
 		prompt = template_content
 		if "{{CLIPBOARD}}" in found_placeholders: prompt = ProjectModel._replace_placeholder_line(prompt, "{{CLIPBOARD}}", clipboard_content)
 
-		content_blocks, oversized_files, truncated_files = [], [], []
+		content_buf, block_count, oversized_files, truncated_files = io.StringIO(), 0, [], []
+		write_blocks = "{{file_contents}}" in found_placeholders
 		total_content_size, total_selection_chars, sanitized_count = 0, 0, 0
 		
-		lang_map = {
-			'.py': 'python', '.js': 'javascript', '.ts': 'typescript', '.html': 'html', '.css': 'css', '.scss': 'scss', '.json': 'json', '.xml': 'xml', '.yaml': 'yaml', '.yml': 'yaml', '.md': 'markdown', '.java': 'java', '.cs': 'csharp', '.cpp': 'cpp', '.c': 'c', '.h': 'c', '.hpp': 'cpp', '.go': 'go', '.rs': 'rust', '.php': 'php', '.rb': 'ruby', '.sh': 'bash', '.ps1': 'powershell', '.sql': 'sql', '.dockerignore': 'dockerignore', 'Dockerfile': 'dockerfile'
-		}
+		has_file_type = '{fileType}' in file_separator_template
 		file_contents = model_config["file_contents"]
 		file_char_counts = model_config["file_char_counts"]
 		settings_data = model_config.get("settings_dict", {})
@@ -799,13 +953,15 @@ class ProjectModel:
 				truncated_files.extend(selection[i:])
 				break
 			
-			filename = os.path.basename(rp); ext = os.path.splitext(rp)[1]
-			lang = lang_map.get(filename, lang_map.get(ext, 'text'))
-			current_separator = file_separator_template.replace('{path}', rp).replace('{fileType}', lang)
-			if '{fileType}' not in file_separator_template:
-				current_separator = current_separator.replace('python', lang)
-			block = current_separator.replace('{contents}', content)
-			content_blocks.append(block)
+			if write_blocks:
+				filename = os.path.basename(rp); ext = os.path.splitext(rp)[1]
+				lang = LANG_MAP.get(filename) or LANG_MAP.get(ext, 'text')
+				current_separator = file_separator_template.replace('{path}', rp).replace('{fileType}', lang)
+				if not has_file_type:
+					current_separator = current_separator.replace('python', lang)
+				content_buf.write(f"{s3}\n\n" if not block_count else "\n")
+				ProjectModel._write_content_block(content_buf, current_separator, content)
+			block_count += 1
 
 			total_content_size += len(content)
 			total_selection_chars += len(content)
@@ -819,78 +975,64 @@ class ProjectModel:
 		files_list_replacement = ""
 		if "{{files_provided}}" in found_placeholders:
 			if selection:
-				lines = "".join(f"- {x}\n" for x in selection)
+				lines = "- " + "\n- ".join(selection) + "\n"
 				files_list_content = f"{s2}\n{lines}".rstrip()
 				files_list_replacement = files_list_content
 			prompt = ProjectModel._replace_placeholder_line(prompt, "{{files_provided}}", files_list_replacement)
 
 		content_replacement = ""
 		if "{{file_contents}}" in found_placeholders:
-			if content_blocks:
-				content_block_text = '\n'.join(content_blocks)
-				content_replacement_content = f"{s3}\n\n{content_block_text}".rstrip()
-				content_replacement = content_replacement_content
+			if block_count: content_replacement = content_buf.getvalue().rstrip()
 			prompt = ProjectModel._replace_placeholder_line(prompt, "{{file_contents}}", content_replacement)
 
 		final_prompt = prompt
 		return final_prompt.rstrip('\n') + '\n', total_selection_chars, oversized_files, truncated_files, sanitized_count
 		
-	def get_config_for_simulation(self):
+	def get_config_for_simulation(self, selection=None):
 		with self._file_content_lock:
+			contents, counts = self.file_contents, self.file_char_counts
 			return {
-				"file_contents": self.file_contents.copy(),
-				"file_char_counts": self.file_char_counts.copy(),
+				"file_contents": contents.copy() if selection is None else {rp: contents[rp] for rp in selection if rp in contents},
+				"file_char_counts": counts.copy() if selection is None else {rp: counts[rp] for rp in selection if rp in counts},
 				"FILE_TOO_LARGE_SENTINEL": self.FILE_TOO_LARGE_SENTINEL,
 				"max_content_size": self.max_content_size,
 				"settings_dict": self.settings_model.get_settings_dict(),
 			}
 
 	def generate_directory_tree_custom(self, max_depth=10, max_lines=1000):
-		if self.directory_tree_cache:
-			return self.directory_tree_cache
 		start_path = self.get_project_path(self.current_project_name)
+		with self._items_lock: current_items, items_version = self.all_items, self.items_version
+		tree_key = (items_version, id(current_items), start_path, max_depth, max_lines)
+		cached = self.directory_tree_cache
+		if cached and cached[0] == tree_key: return cached[1]
+		memo = self._dirtree_memo
+		if tree_key in memo: self.directory_tree_cache = (tree_key, memo[tree_key]); return memo[tree_key]
 		if not self.is_project_path_valid() or not hasattr(self, 'all_items'): return ""
 		tree = {}
-		with self._items_lock:
-			current_items = self.all_items
 		for item in current_items:
 			path_parts = item['path'].strip('/').split('/')
 			if path_parts == ['']: continue
-			current_level = tree
-			for i, part in enumerate(path_parts):
-				is_last_part = (i == len(path_parts) - 1)
-				if item['type'] == 'file' and is_last_part: current_level[part] = 'file'
-				else: current_level = current_level.setdefault(part, {})
+			current_level, is_file = tree, item['type'] == 'file'
+			for part in (path_parts[:-1] if is_file else path_parts): current_level = current_level.setdefault(part, {})
+			if is_file: current_level[path_parts[-1]] = 'file'
 		lines = [os.path.basename(start_path) + "/"]; indent_str = "    "
-		def build_tree_lines(node, depth):
-			nonlocal lines
-			if depth >= max_depth: return
-			keys = sorted(node.keys()); dirs = [k for k in keys if isinstance(node[k], dict)]; files = [k for k in keys if node[k] == 'file']
-			for d in dirs:
-				if len(lines) >= max_lines: return
-				lines.append(f"{indent_str * (depth + 1)}{d}/")
-				if len(lines) < max_lines: build_tree_lines(node[d], depth + 1)
-			for f in files:
-				if len(lines) >= max_lines: return
-				lines.append(f"{indent_str * (depth + 1)}{f}")
-		build_tree_lines(tree, 0)
+		def _children(node): return iter(sorted(node.items(), key=lambda kv: (not isinstance(kv[1], dict), kv[0])))
+		stack = [(_children(tree), indent_str)] if max_depth > 0 else []
+		while stack and len(lines) < max_lines:
+			children, indent = stack[-1]
+			entry = next(children, None)
+			if entry is None: stack.pop(); continue
+			name, child = entry
+			if child == 'file': lines.append(indent + name); continue
+			lines.append(f"{indent}{name}/")
+			if len(stack) < max_depth: stack.append((_children(child), indent + indent_str))
 		if len(lines) >= max_lines: lines.append("... (output truncated due to size limits)")
 		result = "\n".join(lines)
-		if len(lines) > 1: self.directory_tree_cache = result
+		if len(lines) > 1: self.directory_tree_cache = (tree_key, result); memo[tree_key] = result
 		return result
 
 	def _update_outputs_metadata(self, filename, data):
-		try:
-			with FileLock(self.outputs_metadata_lock_file, timeout=2):
-				metadata = {}
-				if os.path.exists(self.outputs_metadata_file):
-					try:
-						with open(self.outputs_metadata_file, 'r', encoding='utf-8') as f:
-							metadata = json.load(f)
-					except (json.JSONDecodeError, IOError): pass
-				metadata[filename] = data
-				with open(self.outputs_metadata_file, 'w', encoding='utf-8') as f:
-					json.dump(metadata, f, indent=4, ensure_ascii=False)
+		try: append_json_log(self.outputs_metadata_file, self.outputs_metadata_lock_file, filename, data)
 		except (Timeout, IOError) as e:
 			logger.error(f"Could not update outputs metadata: {e}")
 
@@ -901,7 +1043,7 @@ class ProjectModel:
 		file_ext = self.settings_model.get('output_file_format', '.md')
 		filename = f"{safe_proj_name}_{ts}{file_ext}"; filepath = os.path.join(self.output_dir, filename)
 		try:
-			with open(filepath, 'w', encoding='utf-8', newline='\n') as f: f.write(output)
+			write_text_atomic(filepath, output)
 			meta_data = {"source_name": source_name, "selection": selection, "is_quick_action": is_quick_action, "project_name": self.current_project_name, "project_id": self.current_project_id}
 			self._update_outputs_metadata(filename, meta_data)
 			open_in_editor(filepath)
@@ -914,7 +1056,7 @@ class ProjectModel:
 		file_ext = self.settings_model.get('output_file_format', '.md')
 		filename = f"{safe_proj_name}_{ts}{file_ext}"; filepath = os.path.join(self.output_dir, filename)
 		try:
-			with open(filepath, 'w', encoding='utf-8', newline='\n') as f: f.write(output)
+			write_text_atomic(filepath, output)
 			project_id = self.get_project_id_by_name(project_name)
 			meta_data = {"source_name": source_name, "selection": selection, "is_quick_action": is_quick_action, "project_name": project_name, "project_id": project_id}
 			self._update_outputs_metadata(filename, meta_data)
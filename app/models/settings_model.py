@@ -88,9 +88,8 @@ class SettingsModel:
 
 	def have_settings_changed(self, ignore_geometry=False):
 		with self.data_lock:
-			s1, s2 = copy.deepcopy(self.settings), copy.deepcopy(self.baseline_settings)
-			if ignore_geometry: s1.pop('window_geometry', None); s2.pop('window_geometry', None)
-			return s1 != s2
+			if not ignore_geometry: return self.settings != self.baseline_settings
+			return {k: v for k, v in self.settings.items() if k != 'window_geometry'} != {k: v for k, v in self.baseline_settings.items() if k != 'window_geometry'}
 	def have_templates_changed(self):
 		with self.data_lock: return self.templates != self.baseline_templates
 	def have_history_changed(self):
@@ -1,7 +1,7 @@
 # File: app/utils/file_io.py
 # LLM NOTE: LLM Editor, follow these code style guidelines: (1) No docstrings or extra comments; (2) Retain the file path comment, LLM note, and grouping/separation markers exactly as is; (3) Favor concise single-line statements; (4) Preserve code structure and organization.
 
-import os, json, logging, traceback, time, random, shutil
+import os, json, logging, traceback, time, random, shutil, codecs
 from filelock import FileLock, Timeout
 from app.config import ensure_data_dirs, INSTANCE_ID
 from pathlib import Path
@@ -48,7 +48,7 @@ def load_json_safely(path, lock_path, error_queue=None, is_fatal=False):
 			return {}
 	return {}
 
-def atomic_write_with_backup(data, path, lock_path, file_key, error_queue=None):
+def atomic_write_with_backup(data, path, lock_path, file_key, error_queue=None, serialized=None):
 	from app.config import LAST_OWN_WRITE_TIMES, LAST_OWN_WRITE_TIMES_LOCK
 	ensure_data_dirs()
 	tmp_path = path + f".tmp.{INSTANCE_ID}"
@@ -58,7 +58,8 @@ def atomic_write_with_backup(data, path, lock_path, file_key, error_queue=None):
 	try:
 		with FileLock(lock_path, timeout=10):
 			with open(tmp_path, 'w', encoding='utf-8') as f:
-				json.dump(data, f, indent=4, ensure_ascii=False)
+				if serialized is not None: f.write(serialized)
+				else: json.dump(data, f, indent=4, ensure_ascii=False)
 			
 			if os.path.exists(bak1_path):
 				try:
@@ -99,9 +100,67 @@ def atomic_write_with_backup(data, path, lock_path, file_key, error_queue=None):
 			try: os.remove(tmp_path)
 			except OSError: pass
 
+def replace_with_retry(src, dst, attempts=5):
+	for attempt in range(attempts):
+		try: return os.replace(src, dst)
+		except PermissionError:
+			if attempt == attempts - 1: raise
+			time.sleep(0.05 * (attempt + 1))
+
+def write_text_atomic(path, text, chunk_size=1 << 20):
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	try:
+		with open(tmp_path, 'wb') as f:
+			for start in range(0, len(text), chunk_size): f.write(text[start:start + chunk_size].encode('utf-8'))
+		replace_with_retry(tmp_path, path)
+	finally:
+		if os.path.exists(tmp_path):
+			try: os.remove(tmp_path)
+			except OSError: pass
+
+_json_base_cache = {}
+
+def load_json_with_log(path):
+	data = {}
+	try: st = os.stat(path); sig = (st.st_mtime_ns, st.st_size)
+	except OSError: sig = None; _json_base_cache.pop(path, None)
+	if sig is not None:
+		hit = _json_base_cache.get(path)
+		if hit and hit[0] == sig: data = dict(hit[1])
+		else:
+			try:
+				with open(path, 'r', encoding='utf-8') as f: loaded = json.load(f)
+				data = loaded if isinstance(loaded, dict) else {}; _json_base_cache[path] = (sig, dict(data))
+			except (json.JSONDecodeError, IOError): pass
+	try:
+		with open(path + '.log', 'r', encoding='utf-8') as f:
+			for line in f:
+				try: entry = json.loads(line); data[entry["f"]] = entry["d"]
+				except (ValueError, KeyError, TypeError): continue
+	except FileNotFoundError: pass
+	except IOError as e: logger.warning("Could not read metadata log for %s: %s", path, e)
+	return data
+
+def append_json_log(path, lock_path, key, value, compact_bytes=256 * 1024):
+	with FileLock(lock_path, timeout=2):
+		with open(path + '.log', 'a', encoding='utf-8') as f: f.write(json.dumps({"f": key, "d": value}, ensure_ascii=False) + '\n'); log_size = f.tell()
+		if log_size < compact_bytes: return
+		write_text_atomic(path, json.dumps(load_json_with_log(path), indent=4, ensure_ascii=False))
+		os.remove(path + '.log')
+
 def safe_read_file(path):
 	try: return Path(path).read_text(encoding='utf-8-sig', errors='replace')
 	except FileNotFoundError: return None
 	except PermissionError: logger.warning("Permission denied for file %s", path); return ""
 	except (OSError, IOError) as e: logger.error("Failed to read file %s: %s", path, e); return ""
+	except Exception as e: logger.error("Unexpected error reading file %s: %s", path, e, exc_info=True); return ""
+
+def read_text_unified(path):
+	try:
+		with open(path, 'rb', buffering=0) as f: data = f.readall()
+		if b'\r' in data: data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+		return codecs.getincrementaldecoder('utf-8-sig')(errors='replace').decode(data, final=True)
+	except FileNotFoundError: return None
+	except PermissionError: logger.warning("Permission denied for file %s", path); return ""
+	except (OSError, IOError) as e: logger.error("Failed to read file %s: %s", path, e); return ""
 	except Exception as e: logger.error("Unexpected error reading file %s: %s", path, e, exc_info=True); return ""
\ No newline at end of file
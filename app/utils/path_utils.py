@@ -1,8 +1,10 @@
 # File: app/utils/path_utils.py
 # LLM NOTE: LLM Editor, follow these code style guidelines: (1) No docstrings or extra comments; (2) Retain the file path comment, LLM note, and grouping/separation markers exactly as is; (3) Favor concise single-line statements; (4) Preserve code structure and organization.
 
-import os, sys, logging, fnmatch
+import os, sys, logging, fnmatch, re
 from app.config import BASE_DIR
+try: import re2
+except ImportError: re2 = None
 
 logger = logging.getLogger(__name__)
 
@@ -86,4 +88,66 @@ def path_should_be_ignored(rel_path, respect_gitignore, gitignore_patterns, keep
 	if respect_gitignore:
 		return match_any_gitignore(path_norm, gitignore_patterns)
 
-	return False
\ No newline at end of file
+	return False
+
+def _fn_re(patterns, flags=0):
+	if not patterns: return None
+	translated = [fnmatch.translate(p) for p in patterns]
+	if re2 is not None and all(t.endswith(r'\Z') and '(?>' not in t and '(?=' not in t for t in translated):
+		try: return re2.compile(('(?i)' if flags & re.I else '') + "|".join(f"(?:{t[:-2]}\\z)" for t in translated))
+		except Exception: pass
+	return re.compile("|".join(f"(?:{t})" for t in translated), flags)
+
+def compile_ignore_matcher(respect_gitignore, gitignore_patterns, keep_patterns, blacklist_patterns):
+	def _norm(p): return normalize_path(p.strip().lower())
+	case_flag = re.I if os.path.normcase('A') == 'a' else 0
+	kp_all = [_norm(kp) for kp in keep_patterns]; kps = [kp for kp in kp_all if kp]
+	kp_base_re = _fn_re([kp for kp in kps if '/' not in kp], case_flag)
+	kp_dir_prefixes = tuple(kp for kp in kps if '/' in kp and kp.endswith('/'))
+	kp_file_prefixes = tuple(kp.rstrip('/') + '/' for kp in kp_dir_prefixes)
+	kp_exact = {kp for kp in kps if '/' in kp and not kp.endswith('/')}
+	bps = [bp for bp in map(_norm, blacklist_patterns) if bp]
+	bp_part_re = _fn_re([bp for bp in bps if '/' not in bp], case_flag)
+	bp_dirs = [bp for bp in bps if '/' in bp and bp.endswith('/')]
+	bp_dir_prefixes, bp_dir_infixes = tuple(bp_dirs), tuple(f"/{bp.rstrip('/')}/" for bp in bp_dirs)
+	bp_paths = [bp for bp in bps if '/' in bp and not bp.endswith('/')]
+	bp_path_exact, bp_path_re, bp_path_prefixes = set(bp_paths), _fn_re(bp_paths, case_flag), tuple(bp + '/' for bp in bp_paths)
+	git_rules = []
+	for pattern in (gitignore_patterns if respect_gitignore else ()):
+		is_negation = pattern.startswith('!')
+		match_pattern = pattern[1:] if is_negation else pattern
+		if not match_pattern: continue
+		if '/' in match_pattern.rstrip('/'): git_rules.append((is_negation, 0, _fn_re([match_pattern], case_flag), False))
+		elif match_pattern.endswith('/'): rule = match_pattern.rstrip('/'); git_rules.append((is_negation, 1, rule, not rule))
+		else: rule = _fn_re([match_pattern], case_flag); git_rules.append((is_negation, 2, rule, bool(rule.match(''))))
+	git_rules.reverse()
+	dir_cache = {}
+
+	def _dir_hits(head, has_head):
+		parts = head.split('/') if has_head else []
+		bp_hit = bool(bp_part_re) and any(bp_part_re.match(part) for part in parts)
+		git_hits = tuple(kind == 1 and rule in parts or kind == 2 and any(rule.match(part) for part in parts) for _, kind, rule, _ in git_rules)
+		return dir_cache.setdefault((head, has_head), (bp_hit, git_hits))
+
+	def ignored(rel_path):
+		path_norm = normalize_path(rel_path.lower())
+		is_dir_path = path_norm.endswith('/')
+		if is_dir_path:
+			if path_norm.startswith(kp_dir_prefixes): return False
+		elif path_norm in kp_exact or path_norm.startswith(kp_file_prefixes): return False
+		head, sep, name = path_norm.rstrip('/').rpartition('/')
+		if kp_base_re and kp_base_re.match(name): return False
+		bp_dir_hit, git_dir_hits = dir_cache.get((head, bool(sep))) or _dir_hits(head, bool(sep))
+		slashed = "/" + path_norm
+		if (bp_dir_hit or (bp_part_re and bp_part_re.match(name))
+			or path_norm.startswith(bp_dir_prefixes) or any(s in slashed for s in bp_dir_infixes)
+			or path_norm in bp_path_exact or path_norm.startswith(bp_path_prefixes) or (bp_path_re and bp_path_re.match(path_norm))):
+			if not (is_dir_path and any(kp.startswith(path_norm) for kp in kp_all)): return True
+		if not git_rules: return False
+		for (is_negation, kind, rule, matches_empty), dir_hit in zip(git_rules, git_dir_hits):
+			if kind == 1: hit = is_dir_path and (dir_hit or rule == name or matches_empty)
+			elif kind == 0: hit = rule.match(path_norm) is not None
+			else: hit = dir_hit or rule.match(name) is not None or (is_dir_path and matches_empty)
+			if hit: return not is_negation
+		return False
+	return ignored
@@ -1,7 +1,7 @@
 # File: app/utils/system_utils.py
 # LLM NOTE: LLM Editor, follow these code style guidelines: (1) No docstrings or extra comments; (2) Retain the file path comment, LLM note, and grouping/separation markers exactly as is; (3) Favor concise single-line statements; (4) Preserve code structure and organization.
 
-import platform, os, subprocess, logging, time
+import platform, os, subprocess, logging, time, threading, heapq, itertools, concurrent.futures
 from contextlib import contextmanager
 import traceback
 from pathlib import Path
@@ -48,4 +48,83 @@ def get_relative_time_str(dt_ts):
 	if diff < 86400: return f"{diff // 3600} hours ago"
 	return f"{diff // 86400} days ago"
 
-def unify_line_endings(text): return text.replace('\r\n', '\n').replace('\r', '\n')
\ No newline at end of file
+class DebounceScheduler:
+	def __init__(self, delay, name="debounce"):
+		self.delay, self.name = delay, name
+		self._deadlines, self._cv, self._thread = {}, threading.Condition(), None
+
+	def schedule(self, key, action):
+		with self._cv:
+			self._deadlines[key] = (time.monotonic() + self.delay, action)
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+				self._thread.start()
+			self._cv.notify()
+
+	def cancel_all(self):
+		with self._cv: self._deadlines.clear(); self._cv.notify()
+
+	def _run(self):
+		while True:
+			with self._cv:
+				if not self._deadlines: self._thread = None; return
+				now = time.monotonic()
+				due = [(k, a) for k, (d, a) in self._deadlines.items() if d <= now]
+				if not due: self._cv.wait(min(d for d, _ in self._deadlines.values()) - now); continue
+				for k, _ in due: del self._deadlines[k]
+			for _, action in due:
+				try: action()
+				except Exception as e: logger.error("Debounced action failed: %s", e, exc_info=True)
+
+class PriorityTaskPool:
+	def __init__(self, max_workers, name="pool"):
+		self.max_workers, self.name = max(1, max_workers), name
+		self._heap, self._latest, self._seq = [], {}, itertools.count()
+		self._cv, self._threads, self._idle = threading.Condition(), [], 0
+
+	def submit(self, priority, fn, *args, supersede_key=None):
+		fut = concurrent.futures.Future()
+		with self._cv:
+			if supersede_key is not None:
+				stale = self._latest.get(supersede_key)
+				if stale is not None: stale.cancel()
+				self._latest[supersede_key] = fut
+			heapq.heappush(self._heap, (priority, next(self._seq), fut, fn, args, supersede_key))
+			if self._idle == 0 and len(self._threads) < self.max_workers:
+				t = threading.Thread(target=self._run, name=f"{self.name}_{len(self._threads)}", daemon=True)
+				self._threads.append(t); t.start()
+			self._cv.notify()
+		return fut
+
+	def _run(self):
+		while True:
+			with self._cv:
+				self._idle += 1
+				while not self._heap: self._cv.wait()
+				self._idle -= 1
+				_, _, fut, fn, args, key = heapq.heappop(self._heap)
+				if key is not None and self._latest.get(key) is fut: del self._latest[key]
+			if not fut.set_running_or_notify_cancel(): continue
+			try: fut.set_result(fn(*args))
+			except BaseException as e: fut.set_exception(e)
+
+def unify_line_endings(text): return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def dedup_lines(text):
+	seen = set(); add = seen.add
+	return '\n'.join([line for line in text.rstrip('\n').split('\n') if not (line in seen or add(line))])
+
+def sort_lines(text, key=None):
+	lines = text.rstrip('\n').split('\n'); lines.sort(key=key)
+	return '\n'.join(lines)
+
+def write_unified_text(path, text, chunk_size=1 << 20):
+	end = len(text)
+	while end and text[end - 1] in '\r\n': end -= 1
+	with open(path, 'wb') as f:
+		start = 0
+		while start < end:
+			stop = min(start + chunk_size, end)
+			if text[stop - 1] == '\r' and stop < end and text[stop] == '\n': stop += 1
+			f.write(unify_line_endings(text[start:stop]).encode('utf-8'))
+			start = stop
\ No newline at end of file
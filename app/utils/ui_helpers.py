@@ -3,10 +3,11 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import platform
+import platform, functools
 
 # Formatting & String Utilities
 # ------------------------------
+@functools.lru_cache(maxsize=1024)
 def format_german_thousand_sep(num): return f"{num:,}".replace(",", ".")
 
 # GUI Helper Utilities
@@ -3,12 +3,12 @@
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import os, threading, queue, json
+import os, threading, queue
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from app.utils.system_utils import get_relative_time_str, unify_line_endings, open_in_editor
 from app.utils.ui_helpers import apply_modal_geometry, format_german_thousand_sep, show_warning_centered, show_error_centered, create_enhanced_text_widget
-from app.utils.file_io import safe_read_file
+from app.utils.file_io import safe_read_file, load_json_with_log
 from app.config import OUTPUT_DIR
 
 # Dialog: OutputFilesDialog
@@ -315,13 +315,8 @@ class OutputFilesDialog(tk.Toplevel):
 			if self.winfo_exists(): self.dialog_queue.put(('files_loaded', files_meta))
 			return
 		
-		metadata_path = os.path.join(OUTPUT_DIR, '_metadata.json')
-		metadata = {}
-		if os.path.exists(metadata_path):
-			try:
-				with open(metadata_path, 'r', encoding='utf-8') as f: metadata = json.load(f)
-			except (json.JSONDecodeError, IOError): pass
-			
+		metadata = load_json_with_log(os.path.join(OUTPUT_DIR, '_metadata.json'))
+
 		for f in os.listdir(OUTPUT_DIR):
 			if f == '_metadata.json' or not f.endswith(('.md', '.txt')): continue
 			fp = os.path.join(OUTPUT_DIR, f)
@@ -176,8 +176,7 @@ class TemplatesDialog(tk.Toplevel):
 			if self.templates.get(t_name) != content:
 				self.templates[t_name] = content
 				if hasattr(self.controller, 'precomputed_prompt_cache'):
-					with self.controller.precompute_file_lock:
-						self.controller.precomputed_prompt_cache.clear()
+					self.controller.precomputed_prompt_cache.clear()
 
 	def toggle_default_template(self):
 		if not self.template_listbox.curselection(): return
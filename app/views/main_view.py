@@ -80,6 +80,7 @@ class MainView(tk.Tk):
 		self.is_currently_searching = False
 		self.managed_expanded_folders = set()
 		self.item_size_cache = {}
+		self.quick_action_buttons = {}
 		self.MIN_LEFT_PANE_WIDTH = 300
 		self.MIN_RIGHT_PANE_WIDTH = 250
 		self.resize_debounce_job = None
@@ -439,7 +440,6 @@ class MainView(tk.Tk):
 		if not force_refresh and list(self.template_dropdown['values']) == display_templates: return
 		self.template_dropdown['values'] = display_templates
 		if display_templates: self.template_dropdown.config(height=min(len(display_templates), 15), width=max(max((len(x) for x in display_templates), default=0)+2, 20))
-		for widget in self.quick_actions_frame.winfo_children(): widget.destroy()
 		qc_template_items = self.controller.settings_model.get_quick_copy_templates()
 		editor_tools = ["Truncate Between '---'", "Replace \"**\"", "Gemini Whitespace Fix", "Remove Duplicates", "Sort Alphabetically", "Sort by Length", "Escape Text", "Unescape Text"]
 		custom_scripts = {"header_formatter": "Format Source Headers"}
@@ -448,12 +448,20 @@ class MainView(tk.Tk):
 		actions_to_create.extend([{'name': name, 'id': name} for name in editor_tools])
 		actions_to_create.extend([{'name': display, 'id': script_id} for script_id, display in custom_scripts.items()])
 		history = self.controller.settings_model.get('quick_action_history', {}); max_button_val = 20
+		if [(a['id'], a['name']) for a in actions_to_create] == [(k, b.original_text) for k, b in self.quick_action_buttons.items()] and all(b.winfo_exists() for b in self.quick_action_buttons.values()):
+			for action_id, btn in self.quick_action_buttons.items():
+				style_name = f"QA_hl_{min(history.get(action_id, {}).get('count', 0), max_button_val)}.TButton"
+				if str(btn.cget('style')) != style_name: btn.configure(style=style_name)
+			actions_to_create = []
+		else:
+			for widget in self.quick_actions_frame.winfo_children(): widget.destroy()
+			self.quick_action_buttons = {}
 		row, col, max_cols = 0, 0, 3
 		for action in actions_to_create:
 			count = history.get(action['id'], {}).get('count', 0)
 			style_idx = min(count, max_button_val)
 			style_name = f"QA_hl_{style_idx}.TButton"
-			btn = ttk.Button(self.quick_actions_frame, text=action['name'], command=lambda a=action['id']: self.controller._execute_quick_action(a), style=style_name)
+			btn = self.quick_action_buttons[action['id']] = ttk.Button(self.quick_actions_frame, text=action['name'], command=lambda a=action['id']: self.controller._execute_quick_action(a), style=style_name)
 			btn.original_text = action['name']
 			btn.grid(row=row, column=col, sticky='ew', padx=2, pady=1)
 			self.quick_actions_scrolled_frame.bind_mousewheel_to_widget(btn)
@@ -755,7 +763,7 @@ class MainView(tk.Tk):
 		self.display_items()
 
 	def update_clipboard(self, text, status_msg=""):
-		self.clipboard_clear(); self.clipboard_append(text)
+		self.clipboard_clear(); self.clipboard_append(text); self.controller.invalidate_clipboard_cache()
 		if status_msg: self.set_status_temporary(status_msg)
 
 	# Bulk & Tree Update / Sorting